@@ -1,196 +1,514 @@
 import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from itertools import groupby, chain
-from typing import List, Dict, Tuple, Optional, TypedDict
-from utils.sharedtypes import NoteInfo, Alignment
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np  # type: ignore
+from utils.sharedtypes import NoteInfo, Alignment, AlignmentElem, AlignmentStats
+from utils.dp import (
+    IndexPair,
+    band_by_ms,
+    band_by_notes,
+    fill,
+    fill_banded,
+    fill_wavefront,
+    hirschberg,
+    iter_traceback,
+    notes_array,
+    score_only,
+    sim_table,
+    times_array,
+    touches_band_edge,
+    traceback_banded,
+)
+from utils.tiled import tiled
+from utils.affine import fill_affine, traceback_affine
+from utils.bitlcs import align_lcs, lcs_length
+from utils.ond import DEFAULT_MAX_DIFF_RATIO, align_ond
+from utils.xdrop import DEFAULT_XDROP, align_xdrop
+from utils.tempo import DEFAULT_TEMPO_TOLERANCE_MS, band_by_tempo, tempo_map
+from utils.local import DEFAULT_SEED, align_local
+from utils.packed import align_packed
+from utils.chord import DEFAULT_ONSET_TOLERANCE_MS, align_groups
+from utils.multires import DEFAULT_RADIUS, align_multires
+from utils.anchor import DEFAULT_NGRAM, align_anchored
 from utils.processfile import process_score_file
 from utils.eprint import eprint
-from utils.postalign import PostAlign
-from utils.repr import alignment_repr
-
-
-class GElem:
-    """
-    Represents an element in ASMAligner's grid G.
-    """
-
-    __allowed = ("n", "score", "left", "down", "diag")
-
-    def __init__(self, **kwargs):
-        self.n: Optional[NoteInfo] = None
-        self.score: Optional[int] = None
-        self.left = False
-        self.down = False
-        self.diag = False
-
-        for k, v in kwargs.items():
-            assert k in self.__class__.__allowed
-            setattr(self, k, v)
+from utils.postalign import DEFAULT_LOOKFORWARD_LIMIT, PostAlign
+from utils.repr import alignment_repr, alignment_stats_repr, write_alignment_repr
+
+# dense: full score/direction grids
+# hirschberg: divide-and-conquer in linear memory, same alignment as dense
+# banded: only cells near the diagonal, widened until the alignment clears the band edge
+# wavefront: as dense, one vector operation per anti-diagonal
+# tiled: as dense, grid tiles filled by a process pool in shared memory
+# chord: onset groups aligned as units, then notes matched within aligned groups
+# multires: coarse-to-fine over onset groups, refined in a corridor at each level
+# anchored: unique shared pitch n-grams matched outright, the rest aligned in parallel
+# lcs: most equal notes paired, everything else gaps, bit-parallel
+# ond: as dense, in a narrow band when P and S differ by few notes
+# xdrop: anti-diagonals without the cells scoring far below their best
+# tempo: only cells near a tempo mapping fitted to onset times of anchored notes
+# local: best-matching region only, for excerpts, searched around seed hits
+# packed: as dense, directions packed 2 bits a cell in a memory-mapped file
+ALIGN_MODES = [
+    "dense",
+    "hirschberg",
+    "banded",
+    "wavefront",
+    "tiled",
+    "chord",
+    "multires",
+    "anchored",
+    "lcs",
+    "ond",
+    "xdrop",
+    "tempo",
+    "local",
+    "packed",
+]
+
+# band half-width (notes) for banded mode if none is given
+DEFAULT_BAND = 32
+
+# modes that can use a custom substitution table, and affine gap penalties
+TABLE_MODES = ["dense", "wavefront", "tiled"]
+AFFINE_MODES = ["dense"]
 
 
 class ASMAligner:
-    def __init__(self, P: List[NoteInfo], S: List[NoteInfo], postalignthres: float):
+    def __init__(
+        self,
+        P: List[NoteInfo],
+        S: List[NoteInfo],
+        postalignthres: float,
+        mode: str = "dense",
+        band: Optional[int] = None,
+        band_ms: Optional[float] = None,
+        workers: Optional[int] = None,
+        onset_tolerance_ms: float = DEFAULT_ONSET_TOLERANCE_MS,
+        radius: int = DEFAULT_RADIUS,
+        ngram: int = DEFAULT_NGRAM,
+        table: Optional[np.ndarray] = None,
+        gap_open: Optional[int] = None,
+        gap_extend: Optional[int] = None,
+        max_diffs: Optional[int] = None,
+        xdrop: int = DEFAULT_XDROP,
+        tempo_tolerance_ms: float = DEFAULT_TEMPO_TOLERANCE_MS,
+        seed: int = DEFAULT_SEED,
+        tmp_dir: Optional[str] = None,
+        lookforward_limit: int = DEFAULT_LOOKFORWARD_LIMIT,
+        postalign_workers: Optional[int] = 1,
+    ):
+        if mode not in ALIGN_MODES:
+            raise ValueError(f"Unknown align mode: {mode}")
         self.ALPHA = 1
         self.GAMMA = -1
         self.BETA_HAT = -12
         self._P = sort_parallel_voices(P)
         self._S = sort_parallel_voices(S)
-        self._G: Dict[int, Dict[int, GElem]] = {}
+        # scores and traceback directions of grid G, filled by _solve
+        self._H: Optional[np.ndarray] = None
+        self._D: Optional[np.ndarray] = None
 
         self.postalignthres = postalignthres
+        self.mode = mode
+        if band is not None and band < 1:
+            raise ValueError(f"Band must be at least 1 note, got {band}")
+        if band_ms is not None and band_ms <= 0:
+            raise ValueError(f"Band must be positive, got {band_ms}ms")
+        # band half-width for banded mode, in notes or in ms of score time
+        self.band = band
+        self.band_ms = band_ms
+        # processes used by tiled and anchored modes, defaults to the number of CPUs
+        self.workers = workers
+        # notes within this many ms of each other form one onset group in chord
+        # and multires modes
+        self.onset_tolerance_ms = onset_tolerance_ms
+        # corridor half-width in multires mode
+        self.radius = radius
+        if ngram < 1:
+            raise ValueError(f"n-gram length must be at least 1, got {ngram}")
+        # length of the pitch n-grams used as anchors in anchored and tempo modes
+        self.ngram = ngram
+
+        # substitution scores indexed [P note, S note], replacing _sim's formula
+        self.table: Optional[np.ndarray] = None
+        if table is not None:
+            if mode not in TABLE_MODES:
+                raise ValueError(f"Substitution table not supported in {mode} mode")
+            self.table = np.asarray(table, dtype=np.int64)
+            if self.table.shape != (128, 128):
+                raise ValueError(
+                    f"Substitution table must be 128x128, got {self.table.shape}"
+                )
+        # a run of k gaps scores gap_open + (k - 1) * gap_extend
+        self.affine = gap_open is not None or gap_extend is not None
+        if self.affine and mode not in AFFINE_MODES:
+            raise ValueError(f"Affine gaps not supported in {mode} mode")
+        self.gap_open = gap_open if gap_open is not None else self.GAMMA
+        self.gap_extend = gap_extend if gap_extend is not None else self.GAMMA
+        if max_diffs is not None and max_diffs < 0:
+            raise ValueError(f"Max differences must not be negative, got {max_diffs}")
+        # most notes P and S may differ by in ond mode before filling the whole grid,
+        # defaults to DEFAULT_MAX_DIFF_RATIO of all notes
+        self.max_diffs = max_diffs
+        if xdrop < 0:
+            raise ValueError(f"X-drop must not be negative, got {xdrop}")
+        # cells scoring more than this below the best of their anti-diagonal are
+        # pruned in xdrop mode
+        self.xdrop = xdrop
+        if tempo_tolerance_ms <= 0:
+            raise ValueError(f"Tolerance must be positive, got {tempo_tolerance_ms}ms")
+        # score ms either side of the tempo mapping searched in tempo mode
+        self.tempo_tolerance_ms = tempo_tolerance_ms
+        if seed < 1:
+            raise ValueError(f"Seed length must be at least 1, got {seed}")
+        # length of the pitch k-grams locating score regions in local mode
+        self.seed = seed
+        # directory of the traceback file in packed mode, defaults to the system's
+        self.tmp_dir = tmp_dir
+        if lookforward_limit < 1:
+            raise ValueError(
+                f"Lookforward limit must be at least 1, got {lookforward_limit}"
+            )
+        # elements PostAlign searches for a note to repair with, counting the current
+        self.lookforward_limit = lookforward_limit
+        # processes PostAlign repairs independent segments in, None for the number
+        # of CPUs
+        self.postalign_workers = postalign_workers
+        if self.gap_open > self.gap_extend:
+            raise ValueError(
+                f"Gap open ({self.gap_open}) must not score higher than "
+                + f"gap extend ({self.gap_extend})"
+            )
 
     def get_alignment(self) -> Alignment:
         """
         Gets the optimal alignment
         """
-        self._set_up()
-        self._solve()
-
-        al = self._get_alignment_helper(
-            1 + len(self._P),
-            1 + len(self._S),
-        )
-        if al is None:
-            raise ValueError("Cannot get alignment")
-
         if self.postalignthres >= 0:
             eprint(f"Running PostAlign with threshold {self.postalignthres}")
-            pa = PostAlign(al, self.postalignthres)
-            al = pa.postalign()
-
-        return al
-
-    def _get_alignment_helper(self, x: int, y: int) -> Optional[Alignment]:
-        if (x, y) == (1, 1):
-            return []
-
-        g = self._get_G(x, y)
-
-        p = self._get_G(x, 0).n
-        s = self._get_G(0, y).n
-
-        if g.diag:
-            al = self._get_alignment_helper(x - 1, y - 1)
-            if al is not None:
-                return al + [{"p": p, "s": s}]
-        if g.left:
-            al = self._get_alignment_helper(x - 1, y)
-            if al is not None:
-                return al + [{"p": p, "s": None}]
-        if g.down:
-            al = self._get_alignment_helper(x, y - 1)
-            if al is not None:
-                return al + [{"p": None, "s": s}]
-        return None
-
-    def _set_up(self):
-        """
-        sets up the grid G
-        """
-        P = self._P
-        S = self._S
-
-        x = 2
-        for p in P:
-            self._set_G(x, 0, GElem(n=p))
-            x += 1
-
-        y = 2
-        for s in S:
-            self._set_G(0, y, GElem(n=s))
-            y += 1
-
-        self._set_G(0, 0, GElem())
-        self._set_G(1, 0, GElem())
-        self._set_G(0, 1, GElem())
-        self._set_G(1, 1, GElem(score=0))
-
-        score_ctr = -1
-        for x in range(2, 2 + len(P)):
-            self._set_G(x, 1, GElem(score=score_ctr, left=True))
-            score_ctr -= 1
-
-        score_ctr = -1
-        for y in range(2, 2 + len(S)):
-            self._set_G(1, y, GElem(score=score_ctr, down=True))
-            score_ctr -= 1
+            pa = PostAlign.from_path(
+                self._get_path(),
+                self._P,
+                self._S,
+                self.postalignthres,
+                self.lookforward_limit,
+                self.postalign_workers,
+            )
+            return pa.postalign()
 
-    def _solve(self):
+        return list(self.iter_alignment())
+
+    def get_alignments(self, thresholds: List[float]) -> List[Alignment]:
         """
-        Starts getting all required scores.
+        Gets the optimal alignment with PostAlign at each of thresholds in place of
+        postalignthres (none where negative), aligning only once. See PostAlign.sweep.
         """
-        self._score(
-            1 + len(self._P),
-            1 + len(self._S),
+        eprint(f"Running PostAlign with thresholds {thresholds}")
+        pa = PostAlign.from_path(
+            self._get_path(),
+            self._P,
+            self._S,
+            self.postalignthres,
+            self.lookforward_limit,
+            self.postalign_workers,
         )
+        return pa.sweep(thresholds)
 
-    def _sim(self, c: NoteInfo, s: NoteInfo) -> int:
+    def get_stats(self) -> AlignmentStats:
         """
-        Calculates the similarity score between c and s.
+        Gets the optimal alignment score and the counts alignment_repr reports for
+        the dense alignment, without PostAlign, in memory linear in len(S).
+        In lcs mode, the score is the number of equal notes paired.
+
+        Much cheaper than get_alignment when tuning ALPHA, GAMMA and BETA_HAT.
         """
-        cn = c["midi_note_num"]
-        sn = s["midi_note_num"]
-        if cn == sn:
-            return self.ALPHA
-        return max(self.BETA_HAT, -abs(cn - sn))
+        if self.table is not None or self.affine:
+            raise ValueError("Score only is not supported with custom scoring")
+        if self.mode == "lcs":
+            score = lcs_length(notes_array(self._P), notes_array(self._S))
+            num_mismatches = 0
+            num_pgaps = len(self._S) - score
+        else:
+            score, num_mismatches, num_pgaps = score_only(
+                notes_array(self._P),
+                notes_array(self._S),
+                self.ALPHA,
+                self.GAMMA,
+                self.BETA_HAT,
+            )
+        # each P note is either aligned or a gap in score, likewise for S
+        num_sgaps = len(self._P) - len(self._S) + num_pgaps
+        return {
+            "score": score,
+            "length": len(self._S) + num_sgaps,
+            "num_pgaps": num_pgaps,
+            "num_sgaps": num_sgaps,
+            "num_mismatches": num_mismatches,
+        }
+
+    def iter_alignment(self) -> Iterator[AlignmentElem]:
+        """
+        Yields the optimal alignment element by element, without PostAlign.
+        """
+        for x, y in self._get_path():
+            yield {
+                "p": self._P[x] if x >= 0 else None,
+                "s": self._S[y] if y >= 0 else None,
+            }
 
-    def _score(self, x: int, y: int) -> int:
+    def _get_path(self) -> Iterable[IndexPair]:
         """
-        Returns the score calculated for G[x][y]
+        Gets the optimal alignment as (P index, S index) pairs.
         """
-        if x == 0 or y == 0:
-            return -100000000
+        if self.mode == "hirschberg":
+            return hirschberg(
+                notes_array(self._P),
+                notes_array(self._S),
+                self.ALPHA,
+                self.GAMMA,
+                self.BETA_HAT,
+            )
+        if self.mode == "banded":
+            return self._get_banded_path()
+        if self.mode == "tempo":
+            return self._get_tempo_path()
+        if self.mode == "wavefront":
+            self._check_note_range()
+            _, D = fill_wavefront(
+                notes_array(self._P),
+                notes_array(self._S),
+                self._sim_table(),
+                self.GAMMA,
+            )
+            return iter_traceback(D)
+        if self.mode == "tiled":
+            self._check_note_range()
+            return tiled(
+                notes_array(self._P),
+                notes_array(self._S),
+                self._sim_table(),
+                self.GAMMA,
+                self.workers,
+            )
+        if self.mode == "chord":
+            self._check_note_range()
+            return align_groups(
+                notes_array(self._P),
+                times_array(self._P),
+                notes_array(self._S),
+                times_array(self._S),
+                self.ALPHA,
+                self.GAMMA,
+                self.BETA_HAT,
+                self.onset_tolerance_ms,
+            )
+        if self.mode == "multires":
+            self._check_note_range()
+            return align_multires(
+                notes_array(self._P),
+                times_array(self._P),
+                notes_array(self._S),
+                times_array(self._S),
+                self.ALPHA,
+                self.GAMMA,
+                self.BETA_HAT,
+                self.radius,
+                self.onset_tolerance_ms,
+            )
+        if self.mode == "ond":
+            max_diffs = self.max_diffs
+            if max_diffs is None:
+                max_diffs = int(DEFAULT_MAX_DIFF_RATIO * (len(self._P) + len(self._S)))
+            path = align_ond(
+                notes_array(self._P),
+                notes_array(self._S),
+                self.ALPHA,
+                self.GAMMA,
+                self.BETA_HAT,
+                max_diffs,
+            )
+            if path is not None:
+                return path
+            eprint(f"More than {max_diffs} differences, filling the whole grid")
+        if self.mode == "xdrop":
+            self._check_note_range()
+            path, computed = align_xdrop(
+                notes_array(self._P),
+                notes_array(self._S),
+                sim_table(self.ALPHA, self.BETA_HAT),
+                self.GAMMA,
+                self.xdrop,
+            )
+            cells = (len(self._P) + 1) * (len(self._S) + 1)
+            eprint(f"X-drop pruned {1 - computed / cells:.1%} of {cells} cells")
+            return path
+        if self.mode == "local":
+            self._check_note_range()
+            return align_local(
+                notes_array(self._P),
+                notes_array(self._S),
+                self.ALPHA,
+                self.GAMMA,
+                self.BETA_HAT,
+                self.seed,
+            )
+        if self.mode == "packed":
+            return align_packed(
+                notes_array(self._P),
+                notes_array(self._S),
+                self.ALPHA,
+                self.GAMMA,
+                self.BETA_HAT,
+                self.tmp_dir,
+            )
+        if self.mode == "lcs":
+            return align_lcs(notes_array(self._P), notes_array(self._S))
+        if self.mode == "anchored":
+            self._check_note_range()
+            return align_anchored(
+                notes_array(self._P),
+                notes_array(self._S),
+                self.ALPHA,
+                self.GAMMA,
+                self.BETA_HAT,
+                self.ngram,
+                self.workers,
+            )
 
-        sc = self._get_G(x, y).score if x in self._G and y in self._G[x] else None
-        if sc is None:
-            c = self._get_G(x, 0).n
-            if c is None:
-                raise ValueError(f"_score called with invalid x: {x}")
-            s = self._get_G(0, y).n
-            if s is None:
-                raise ValueError(f"_score called with invalid x: {x}")
+        self._solve()
+        if self._D is None:
+            raise ValueError("Cannot get alignment")
+        if self._custom_scoring():
+            return traceback_affine(self._D)
+        return iter_traceback(self._D)
 
-            sim_val = self._sim(c, s)
+    def _get_banded_path(self) -> List[IndexPair]:
+        """
+        Aligns within a band around the diagonal, doubling the band while the
+        alignment runs along its edge.
+        """
+        p = notes_array(self._P)
+        s = notes_array(self._S)
+        s_times = times_array(self._S)
+        band = self.band if self.band is not None else DEFAULT_BAND
+        band_ms = self.band_ms
+
+        while True:
+            if band_ms is not None:
+                lo, hi = band_by_ms(len(p), s_times, band_ms)
+            else:
+                lo, hi = band_by_notes(len(p), len(s), band)
+            _, D = fill_banded(p, s, lo, hi, self.ALPHA, self.GAMMA, self.BETA_HAT)
+            path = traceback_banded(D, lo, len(s))
+            if not touches_band_edge(path, lo, hi, len(s)):
+                return path
+
+            if band_ms is not None:
+                band_ms *= 2
+                eprint(f"Alignment touches band edge, widening band to {band_ms}ms")
+            else:
+                band *= 2
+                eprint(f"Alignment touches band edge, widening band to {band} notes")
+
+    def _get_tempo_path(self) -> List[IndexPair]:
+        """
+        Aligns within a band around the tempo mapping, doubling the tolerance
+        while the alignment runs along the band edge.
+        """
+        p = notes_array(self._P)
+        s = notes_array(self._S)
+        p_times = times_array(self._P)
+        s_times = times_array(self._S)
+        knots = tempo_map(p, p_times, s, s_times, self.ngram)
+        tolerance_ms = self.tempo_tolerance_ms
+
+        while True:
+            lo, hi = band_by_tempo(p_times, s_times, knots, tolerance_ms)
+            _, D = fill_banded(p, s, lo, hi, self.ALPHA, self.GAMMA, self.BETA_HAT)
+            path = traceback_banded(D, lo, len(s))
+            if not touches_band_edge(path, lo, hi, len(s)):
+                return path
+
+            tolerance_ms *= 2
+            eprint(
+                f"Alignment touches band edge, widening tolerance to {tolerance_ms}ms"
+            )
 
-            score_case_1 = self._score(x - 1, y - 1) + sim_val
-            score_case_2 = self._score(x - 1, y) + self.GAMMA
-            score_case_3 = self._score(x, y - 1) + self.GAMMA
+    def _check_note_range(self):
+        """
+        Makes sure all notes can index a 128x128 similarity table.
+        """
+        for n in chain(self._P, self._S):
+            if not 0 <= n["midi_note_num"] < 128:
+                raise ValueError(f"MIDI note number out of range: {n}")
 
-            sc = max(
-                score_case_1,
-                score_case_2,
-                score_case_3,
-            )
+    def _custom_scoring(self) -> bool:
+        return self.table is not None or self.affine
 
-            self._set_G(
-                x,
-                y,
-                GElem(
-                    score=sc,
-                    diag=sc == score_case_1,
-                    left=sc == score_case_2,
-                    down=sc == score_case_3,
-                ),
-            )
-        return sc
+    def _sim_table(self) -> np.ndarray:
+        """
+        _sim between every pair of MIDI note numbers, indexed [P note, S note].
+        """
+        if self.table is not None:
+            return self.table
+        return sim_table(self.ALPHA, self.BETA_HAT)
 
-    def _set_G(self, x: int, y: int, e: GElem):
+    def _solve(self):
         """
-        Sets G[x][y]
+        Fills the grid G bottom-up.
         """
-        if x not in self._G:
-            self._G[x] = {}
-        self._G[x][y] = e
+        if self._custom_scoring():
+            self._check_note_range()
+            self._H, self._D = fill_affine(
+                notes_array(self._P),
+                notes_array(self._S),
+                self._sim_table(),
+                self.gap_open,
+                self.gap_extend,
+            )
+            return
+        self._H, self._D = fill(
+            notes_array(self._P),
+            notes_array(self._S),
+            self.ALPHA,
+            self.GAMMA,
+            self.BETA_HAT,
+        )
 
-    def _get_G(self, x: int, y: int) -> GElem:
+    def alignment_score(self, alignment: Iterable[AlignmentElem]) -> int:
         """
-        Gets G[x][y]
+        Score of alignment under this aligner's scoring.
         """
-        if x not in self._G:
-            raise ValueError(f"No ({x}, ...) in G")
-        if y not in self._G[x]:
-            raise ValueError(f"No ({x}, {y}) in G")
+        score = 0
+        # kind of gap the previous element was, if any
+        prev_gap = ""
+        for el in alignment:
+            p = el["p"]
+            s = el["s"]
+            if p is not None and s is not None:
+                score += self._sim(p, s)
+                prev_gap = ""
+                continue
+            gap = "p" if p is None else "s"
+            score += self.gap_extend if gap == prev_gap else self.gap_open
+            prev_gap = gap
+        return score
 
-        return self._G[x][y]
+    def _sim(self, c: NoteInfo, s: NoteInfo) -> int:
+        """
+        Calculates the similarity score between c and s.
+        """
+        cn = c["midi_note_num"]
+        sn = s["midi_note_num"]
+        if self.table is not None:
+            return int(self.table[cn, sn])
+        if cn == sn:
+            return self.ALPHA
+        return max(self.BETA_HAT, -abs(cn - sn))
 
 
 def sort_parallel_voices(notes: List[NoteInfo]) -> List[NoteInfo]:
@@ -206,9 +524,45 @@ def sort_parallel_voices(notes: List[NoteInfo]) -> List[NoteInfo]:
     return list(chain.from_iterable(sorted_grouped_par_notes))
 
 
-def print_alignment(alignment: Alignment):
-    stdout, stderr = alignment_repr(alignment)
-    print(stdout)
+def align_many(
+    pairs: List[Tuple[List[NoteInfo], List[NoteInfo]]],
+    postalignthres: float,
+    workers: Optional[int] = None,
+    **kwargs: Any,
+) -> Iterator[Tuple[int, Alignment]]:
+    """
+    Aligns each (P, S) of pairs with ASMAligner(P, S, postalignthres, **kwargs),
+    spread over a pool of workers processes (defaults to the number of CPUs).
+    Tiled and anchored modes run with a single worker each, the pool being busy.
+
+    The largest len(P) * len(S) pairs are started first, so a big pair does not
+    hold up the end of the run. Yields (index in pairs, alignment) as each
+    alignment completes.
+    """
+    order = sorted(
+        range(len(pairs)), key=lambda x: -len(pairs[x][0]) * len(pairs[x][1])
+    )
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                _align_pair, pairs[x][0], pairs[x][1], postalignthres, kwargs
+            ): x
+            for x in order
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _align_pair(
+    P: List[NoteInfo], S: List[NoteInfo], postalignthres: float, kwargs: Dict[str, Any]
+) -> Alignment:
+    return ASMAligner(P, S, postalignthres, workers=1, **kwargs).get_alignment()
+
+
+def print_alignment(alignment: Iterable[AlignmentElem]):
+    stderr = write_alignment_repr(alignment, sys.stdout.write)
+    print()
     eprint(stderr)
 
 
@@ -218,11 +572,16 @@ if __name__ == "__main__":
         + "from the performance score and the reference score"
     )
 
+    parser.add_argument("--pscore", type=str, help="Path to performance score")
+    parser.add_argument("--rscore", type=str, help="Path to reference score")
     parser.add_argument(
-        "--pscore", type=str, help="Path to performance score", required=True
-    )
-    parser.add_argument(
-        "--rscore", type=str, help="Path to reference score", required=True
+        "--manifest",
+        type=str,
+        help="Path to a manifest of pairs to align instead of --pscore and --rscore, "
+        + "one per line: performance score path, reference score path and output "
+        + "path, separated by whitespace. Each alignment is written to its output "
+        + "path as it completes.",
+        default=None,
     )
     parser.add_argument(
         "--postalignthres",
@@ -233,16 +592,237 @@ if __name__ == "__main__":
         + "Useful for pieces with strong polyphony. Warning: perturbs score data!",
         default=0,
     )
+    parser.add_argument(
+        "--sweep",
+        type=float,
+        nargs="+",
+        help="Thresholds to run PostAlign at instead of --postalignthres, aligning "
+        + "only once. Each alignment is written to <THRESHOLD>.txt in --output_dir.",
+        default=None,
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        help="Directory to write the alignments of --sweep to",
+        default=None,
+    )
+    parser.add_argument(
+        "--lookforward_limit",
+        type=int,
+        help="Number of alignment elements, counting the current one, PostAlign "
+        + "searches for a note to repair the current one with. Larger may fix more "
+        + f"but takes longer. Defaults to {DEFAULT_LOOKFORWARD_LIMIT}.",
+        default=DEFAULT_LOOKFORWARD_LIMIT,
+    )
+    parser.add_argument(
+        "--postalign_workers",
+        type=int,
+        help="Number of worker processes PostAlign repairs independent segments of "
+        + "the alignment in (segments further apart in score time than the threshold). "
+        + "0 for the number of CPUs. Defaults to 1.",
+        default=1,
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=ALIGN_MODES,
+        help="Alignment algorithm, see README.md",
+        default="dense",
+    )
+    parser.add_argument(
+        "--band",
+        type=int,
+        help="Band half-width (in notes) around the diagonal for banded mode. "
+        + f"Widened automatically if too narrow. Defaults to {DEFAULT_BAND}.",
+        default=None,
+    )
+    parser.add_argument(
+        "--band_ms",
+        type=float,
+        help="Band half-width (in ms of score time) around the diagonal for banded mode. "
+        + "Overrides --band.",
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes for tiled and anchored modes, or with "
+        + "--manifest, for aligning pairs at once. Defaults to the number of CPUs.",
+        default=None,
+    )
+    parser.add_argument(
+        "--onset_tolerance_ms",
+        type=float,
+        help="Notes starting within this many ms of the first note of an onset group "
+        + "join the group in chord and multires modes.",
+        default=DEFAULT_ONSET_TOLERANCE_MS,
+    )
+    parser.add_argument(
+        "--radius",
+        type=int,
+        help="Corridor half-width (in units of the finer level) around the path "
+        + "projected from the coarser level in multires mode.",
+        default=DEFAULT_RADIUS,
+    )
+    parser.add_argument(
+        "--ngram",
+        type=int,
+        help="Length of the exact pitch n-grams, unique in both scores, used as "
+        + f"anchors in anchored and tempo modes. Defaults to {DEFAULT_NGRAM}.",
+        default=DEFAULT_NGRAM,
+    )
+    parser.add_argument(
+        "--sim_table",
+        type=str,
+        help="Path to a whitespace-separated 128x128 table of substitution scores "
+        + "(rows: performance MIDI note number, columns: score MIDI note number), "
+        + "replacing the default similarity. Dense, wavefront and tiled modes only.",
+        default=None,
+    )
+    parser.add_argument(
+        "--gap_open",
+        type=int,
+        help="Score of the first gap in a run of gaps. Defaults to the gap score. "
+        + "Dense mode only.",
+        default=None,
+    )
+    parser.add_argument(
+        "--gap_extend",
+        type=int,
+        help="Score of each further gap in a run of gaps. Defaults to the gap score. "
+        + "Dense mode only.",
+        default=None,
+    )
+    parser.add_argument(
+        "--max_diffs",
+        type=int,
+        help="Most notes the performance and score may differ by (counting each "
+        + "unpaired note) for ond mode to stay in a narrow band, beyond which it "
+        + "fills the whole grid. "
+        + f"Defaults to {DEFAULT_MAX_DIFF_RATIO * 100:g}%% of all notes.",
+        default=None,
+    )
+    parser.add_argument(
+        "--xdrop",
+        type=int,
+        help="In xdrop mode, cells scoring more than this below the best cell of "
+        + f"their anti-diagonal are pruned. Defaults to {DEFAULT_XDROP}.",
+        default=DEFAULT_XDROP,
+    )
+    parser.add_argument(
+        "--tempo_tolerance_ms",
+        type=float,
+        help="In tempo mode, score notes starting within this many ms of the score "
+        + "time the tempo mapping gives a performance note are searched. "
+        + f"Widened automatically if too narrow. Defaults to {DEFAULT_TEMPO_TOLERANCE_MS}.",
+        default=DEFAULT_TEMPO_TOLERANCE_MS,
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Length of the exact pitch k-grams shared by the performance and the "
+        + "score that locate the score regions searched in local mode. "
+        + f"Defaults to {DEFAULT_SEED}.",
+        default=DEFAULT_SEED,
+    )
+    parser.add_argument(
+        "--tmp_dir",
+        type=str,
+        help="Directory for the memory-mapped traceback file in packed mode. "
+        + "Defaults to the system's temporary directory.",
+        default=None,
+    )
+    parser.add_argument(
+        "--score_only",
+        action="store_true",
+        help="Only print the optimal alignment score and the alignment counts, "
+        + "skipping the traceback and PostAlign. Useful for parameter sweeps.",
+    )
 
     args = parser.parse_args()
+    if args.manifest is None and (args.pscore is None or args.rscore is None):
+        parser.error("--pscore and --rscore are required without --manifest")
+    if args.manifest is not None and (
+        args.pscore is not None or args.rscore is not None or args.score_only
+    ):
+        parser.error(
+            "--manifest cannot be used with --pscore, --rscore or --score_only"
+        )
+    if (args.sweep is None) != (args.output_dir is None):
+        parser.error("--sweep and --output_dir must be used together")
+    if args.sweep is not None and (args.manifest is not None or args.score_only):
+        parser.error("--sweep cannot be used with --manifest or --score_only")
     pscore_path = args.pscore
     rscore_path = args.rscore
     postalignthres = args.postalignthres
+    mode = args.mode
+    band = args.band
+    band_ms = args.band_ms
+    workers = args.workers
+    onset_tolerance_ms = args.onset_tolerance_ms
+    radius = args.radius
+    ngram = args.ngram
+    table = np.loadtxt(args.sim_table, dtype=np.int64) if args.sim_table else None
+    gap_open = args.gap_open
+    gap_extend = args.gap_extend
+    max_diffs = args.max_diffs
+    xdrop = args.xdrop
+    tempo_tolerance_ms = args.tempo_tolerance_ms
+    seed = args.seed
+    tmp_dir = args.tmp_dir
+    lookforward_limit = args.lookforward_limit
+    postalign_workers = args.postalign_workers if args.postalign_workers > 0 else None
+
+    options: Dict[str, Any] = {
+        "mode": mode,
+        "band": band,
+        "band_ms": band_ms,
+        "onset_tolerance_ms": onset_tolerance_ms,
+        "radius": radius,
+        "ngram": ngram,
+        "table": table,
+        "gap_open": gap_open,
+        "gap_extend": gap_extend,
+        "max_diffs": max_diffs,
+        "xdrop": xdrop,
+        "tempo_tolerance_ms": tempo_tolerance_ms,
+        "seed": seed,
+        "tmp_dir": tmp_dir,
+        "lookforward_limit": lookforward_limit,
+        "postalign_workers": postalign_workers,
+    }
+
+    if args.manifest is not None:
+        f = open(args.manifest)
+        jobs = [line.split() for line in f if line.strip()]
+        f.close()
+        pairs = [(process_score_file(p), process_score_file(r)) for p, r, _ in jobs]
+        for x, alignment in align_many(pairs, postalignthres, workers, **options):
+            output_path = jobs[x][2]
+            out = open(output_path, "w")
+            stderr = write_alignment_repr(alignment, out.write)
+            out.write("\n")
+            out.close()
+            eprint(f"{output_path}:\n{stderr}")
+        sys.exit(0)
 
     P = process_score_file(pscore_path)
     S = process_score_file(rscore_path)
 
-    aligner = ASMAligner(P, S, postalignthres)
-    alignment = aligner.get_alignment()
-
-    print_alignment(alignment)
+    aligner = ASMAligner(P, S, postalignthres, workers=workers, **options)
+    if args.sweep is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for thres, alignment in zip(args.sweep, aligner.get_alignments(args.sweep)):
+            output_path = os.path.join(args.output_dir, f"{thres:g}.txt")
+            out = open(output_path, "w")
+            stderr = write_alignment_repr(alignment, out.write)
+            out.write("\n")
+            out.close()
+            eprint(f"{output_path}:\n{stderr}")
+    elif args.score_only:
+        print(alignment_stats_repr(aligner.get_stats()), end="")
+    elif postalignthres >= 0:
+        print_alignment(aligner.get_alignment())
+    else:
+        # nothing to fix up, stream the alignment out as it is traced back
+        print_alignment(aligner.iter_alignment())
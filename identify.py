@@ -0,0 +1,84 @@
+import argparse
+import time
+from align import ALIGN_MODES, ASMAligner
+from utils.processfile import process_notes_file
+from utils.eprint import eprint
+from utils.scoreindex import DEFAULT_CHORD_TOLERANCE_MS
+from utils.sketch import DEFAULT_SHINGLE, SketchLibrary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Identify which score of a library a performance is of, by "
+        + "ranking the scores on MinHash and pitch class histogram sketches and "
+        + "only aligning against the best few."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Sketch scores")
+    build.add_argument(
+        "--scores",
+        type=str,
+        nargs="+",
+        help="Paths to scores (score files, or MIDI files ending in .mid/.midi)",
+        required=True,
+    )
+    build.add_argument("--output", type=str, help="Output library path", required=True)
+    build.add_argument(
+        "--shingle",
+        type=int,
+        help=f"Notes per shingle. Defaults to {DEFAULT_SHINGLE}.",
+        default=DEFAULT_SHINGLE,
+    )
+    build.add_argument(
+        "--tolerance_ms",
+        type=float,
+        help="Notes starting within this many ms of the first note of a chord "
+        + f"belong to the chord. Defaults to {DEFAULT_CHORD_TOLERANCE_MS}.",
+        default=DEFAULT_CHORD_TOLERANCE_MS,
+    )
+
+    rank = subparsers.add_parser(
+        "rank", help="Rank library scores by similarity to a performance"
+    )
+    rank.add_argument("--library", type=str, help="Path to library", required=True)
+    rank.add_argument(
+        "--pscore",
+        type=str,
+        help="Path to performance (score file, or MIDI file ending in .mid/.midi)",
+        required=True,
+    )
+    rank.add_argument(
+        "--top_k",
+        type=int,
+        help="Number of best ranked scores to align the performance against. "
+        + "0 to only rank.",
+        default=3,
+    )
+    rank.add_argument(
+        "--mode",
+        type=str,
+        choices=ALIGN_MODES,
+        help="Alignment algorithm, see README.md",
+        default="dense",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        library = SketchLibrary(args.shingle, args.tolerance_ms)
+        for path in args.scores:
+            library.add(path, process_notes_file(path))
+        library.save(args.output)
+    else:
+        library = SketchLibrary.load(args.library)
+        P = process_notes_file(args.pscore)
+        t = time.perf_counter()
+        candidates = library.rank(P)
+        eprint(f"Ranking took {(time.perf_counter() - t) * 1000:.3f}ms")
+        # score, estimated jaccard, histogram cosine, alignment score (top_k only)
+        for i, c in enumerate(candidates):
+            line = f'{c["name"]} {c["jaccard"]:.4f} {c["cosine"]:.4f}'
+            if i < args.top_k:
+                aligner = ASMAligner(P, process_notes_file(c["name"]), -1, args.mode)
+                line += f" {aligner.alignment_score(aligner.iter_alignment())}"
+            print(line)
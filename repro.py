@@ -6,6 +6,27 @@ import os
 REPO_ROOT = os.path.dirname(os.path.realpath(__file__))
 DATA_PATH = os.path.join(REPO_ROOT, "data")
 REPRO_RESULTS_PATH = os.path.join(REPO_ROOT, "repro_results")
+BACH10_PATH = os.path.join(DATA_PATH, "Bach10_v1.1")
+
+
+def bach10_refalign_to_pscore(refalignpath: str):
+    """
+    Performance score from a Bach10 reference alignment file.
+    """
+    from utils.sharedtypes import NoteInfo
+
+    f = open(refalignpath)
+    t = f.read().strip()
+    f.close()
+
+    def process_line(line: str) -> NoteInfo:
+        ls = line.split()
+        if len(ls) < 4:
+            raise ValueError(f"Too few entries on line: {line}")
+        # (performance time (ms), MIDI note num)
+        return {"note_start": float(ls[0]), "midi_note_num": int(ls[2])}
+
+    return list(map(process_line, t.splitlines()))
 
 
 def bach10():
@@ -19,7 +40,6 @@ def bach10():
     from utils.processfile import process_ref_file
     from utils.match import match
 
-    BACH10_PATH = os.path.join(DATA_PATH, "Bach10_v1.1")
     OUTPUT_PATH = os.path.join(REPRO_RESULTS_PATH, "bach10")
     os.makedirs(OUTPUT_PATH, exist_ok=True)
     BACH10_PIECE_PATHS = [
@@ -35,7 +55,7 @@ def bach10():
             self.dirpath = os.path.join(BACH10_PATH, name)
             self.refalignpath = os.path.join(self.dirpath, f"{self.name}.txt")
             self.rscorepath = os.path.join(self.dirpath, f"{self.name}.mid")
-            self.pscore: List[NoteInfo] = self._refalign_to_pscore()
+            self.pscore: List[NoteInfo] = bach10_refalign_to_pscore(self.refalignpath)
             self.rscore: List[NoteInfo] = process_midi(self.rscorepath)
             self.postalignthres = postalignthres
 
@@ -49,20 +69,6 @@ def bach10():
 
             return alignment
 
-        def _refalign_to_pscore(self) -> List[NoteInfo]:
-            f = open(self.refalignpath)
-            t = f.read().strip()
-            f.close()
-
-            def process_line(line: str) -> NoteInfo:
-                ls = line.split()
-                if len(ls) < 4:
-                    raise ValueError(f"Too few entries on line: {line}")
-                # (performance time (ms), MIDI note num)
-                return {"note_start": float(ls[0]), "midi_note_num": int(ls[2])}
-
-            return list(map(process_line, t.splitlines()))
-
     def align_piece(name: str, postalignthres: float) -> Alignment:
         p = Bach10Piece(name, postalignthres)
         return p.align()
@@ -134,8 +140,6 @@ def bwv846():
         os.makedirs(piece_output_path, exist_ok=True)
 
         for postalignthres in postalignthreses:
-            eprint(f"Post align thres: {postalignthres}")
-
             # with postalignthres
             actual_output_path = os.path.join(piece_output_path, str(postalignthres))
             os.makedirs(actual_output_path, exist_ok=True)
@@ -156,14 +160,21 @@ def bwv846():
                 of.write(mid_str)
                 of.close()
 
-            pscore_path = os.path.join(actual_output_path, f"{piece}.pscore.txt")
-            rscore_path = os.path.join(actual_output_path, f"{piece}.rscore.txt")
+        # the score files are the same for every threshold
+        actual_output_path = os.path.join(piece_output_path, str(postalignthreses[0]))
+        pscore_path = os.path.join(actual_output_path, f"{piece}.pscore.txt")
+        rscore_path = os.path.join(actual_output_path, f"{piece}.rscore.txt")
 
-            P = process_score_file(pscore_path)
-            S = process_score_file(rscore_path)
+        P = process_score_file(pscore_path)
+        S = process_score_file(rscore_path)
 
-            aligner = ASMAligner(P, S, postalignthres)
-            alignment = aligner.get_alignment()
+        # align once, PostAlign at every threshold
+        aligner = ASMAligner(P, S, -1)
+        alignments = aligner.get_alignments(postalignthreses)
+
+        for postalignthres, alignment in zip(postalignthreses, alignments):
+            eprint(f"Post align thres: {postalignthres}")
+            actual_output_path = os.path.join(piece_output_path, str(postalignthres))
 
             stdout, stderr = alignment_repr(alignment)
 
@@ -183,6 +194,73 @@ def bwv846():
         eprint()
 
 
+def multires():
+    import re
+    import json
+    import time
+    from typing import Dict, List, Tuple
+    from midi import process_midi
+    from align import ASMAligner
+    from utils.sharedtypes import NoteInfo
+    from utils.eprint import eprint
+
+    OUTPUT_PATH = os.path.join(REPRO_RESULTS_PATH, "multires")
+    os.makedirs(OUTPUT_PATH, exist_ok=True)
+
+    pieces: List[Tuple[str, List[NoteInfo], List[NoteInfo]]] = []
+    for piece in ["prelude", "fugue"]:
+        piece_path = os.path.join(DATA_PATH, "bwv846", piece)
+        pieces.append(
+            (
+                f"bwv846-{piece}",
+                process_midi(os.path.join(piece_path, f"{piece}.p.mid")),
+                process_midi(os.path.join(piece_path, f"{piece}.r.mid")),
+            )
+        )
+    if os.path.isdir(BACH10_PATH):
+        for f in sorted(os.scandir(BACH10_PATH), key=lambda f: f.name):
+            if f.is_dir() and bool(re.search(r"^[0-9]{2}-\w+$", f.name)):
+                pieces.append(
+                    (
+                        f.name,
+                        bach10_refalign_to_pscore(
+                            os.path.join(f.path, f"{f.name}.txt")
+                        ),
+                        process_midi(os.path.join(f.path, f"{f.name}.mid")),
+                    )
+                )
+    else:
+        eprint(f"Skipping Bach10: {BACH10_PATH} not found")
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, P, S in pieces:
+        eprint(f"Aligning {name}")
+        exact = ASMAligner(P, S, -1, "hirschberg")
+        t = time.time()
+        optimum = exact.alignment_score(exact.get_alignment())
+        exact_time = time.time() - t
+
+        approx = ASMAligner(P, S, -1, "multires")
+        t = time.time()
+        score = approx.alignment_score(approx.get_alignment())
+        approx_time = time.time() - t
+
+        results[name] = {
+            "optimum_score": optimum,
+            "multires_score": score,
+            "deviation": optimum - score,
+            "optimum_time_s": exact_time,
+            "multires_time_s": approx_time,
+        }
+
+    res_file_path = os.path.join(OUTPUT_PATH, "multires.json")
+    rf = open(res_file_path, "w")
+    rf.write(json.dumps(results, indent=4))
+    rf.close()
+
+    print(f"OUTPUT: {OUTPUT_PATH}")
+
+
 """
 def bach10_oracle():
     import re
@@ -287,6 +365,7 @@ def bach10_oracle():
 func_map = {
     "bwv846": bwv846,
     "bach10": bach10,
+    "multires": multires,
     # "bach10_oracle": bach10_oracle,
 }
 if __name__ == "__main__":
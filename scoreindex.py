@@ -0,0 +1,66 @@
+import argparse
+import time
+from utils.processfile import process_notes_file
+from utils.eprint import eprint
+from utils.scoreindex import DEFAULT_CHORD_TOLERANCE_MS, DEFAULT_INDEX_NGRAM, ScoreIndex
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Transposition-invariant pitch-interval n-gram index over a "
+        + "library of scores, to find where a fragment of a performance starts."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Index scores")
+    build.add_argument(
+        "--scores",
+        type=str,
+        nargs="+",
+        help="Paths to scores (score files, or MIDI files ending in .mid/.midi)",
+        required=True,
+    )
+    build.add_argument("--output", type=str, help="Output index path", required=True)
+    build.add_argument(
+        "--n",
+        type=int,
+        help=f"Notes per indexed n-gram. Defaults to {DEFAULT_INDEX_NGRAM}.",
+        default=DEFAULT_INDEX_NGRAM,
+    )
+    build.add_argument(
+        "--tolerance_ms",
+        type=float,
+        help="Notes starting within this many ms of the first note of a chord "
+        + f"belong to the chord. Defaults to {DEFAULT_CHORD_TOLERANCE_MS}.",
+        default=DEFAULT_CHORD_TOLERANCE_MS,
+    )
+
+    lookup = subparsers.add_parser(
+        "lookup", help="Find the score positions a fragment most likely starts at"
+    )
+    lookup.add_argument("--index", type=str, help="Path to index", required=True)
+    lookup.add_argument(
+        "--fragment",
+        type=str,
+        help="Path to fragment (score file, or MIDI file ending in .mid/.midi)",
+        required=True,
+    )
+    lookup.add_argument(
+        "--top", type=int, help="Number of candidates to output", default=10
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = ScoreIndex(args.n, args.tolerance_ms)
+        for path in args.scores:
+            index.add(path, process_notes_file(path))
+        index.save(args.output)
+    else:
+        index = ScoreIndex.load(args.index)
+        fragment = process_notes_file(args.fragment)
+        t = time.perf_counter()
+        candidates = index.lookup(fragment, args.top)
+        eprint(f"Lookup took {(time.perf_counter() - t) * 1000:.3f}ms")
+        # score, position (note index), score time (ms), votes
+        for c in candidates:
+            print(f'{c["name"]} {c["position"]} {c["note_start"]} {c["votes"]}')
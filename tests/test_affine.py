@@ -0,0 +1,80 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.affine import affine_path_score, fill_affine, traceback_affine
+from utils.dp import IndexPair, fill, sim_table, traceback
+
+
+class TestFillAffine(unittest.TestCase):
+    def test_fill_affine(self):
+        cases: List[Tuple[List[int], List[int], int, int, List[IndexPair]]] = [
+            ([], [], -3, -1, []),
+            ([60], [], -3, -1, [(0, -1)]),
+            ([], [60, 62], -3, -1, [(-1, 0), (-1, 1)]),
+            # two short gaps around 62 when gaps are linear ...
+            (
+                [60, 62, 64, 70],
+                [60, 61, 62, 63, 64, 65, 66, 67, 70],
+                -1,
+                -1,
+                [
+                    (0, 0),
+                    (-1, 1),
+                    (1, 2),
+                    (-1, 3),
+                    (2, 4),
+                    (-1, 5),
+                    (-1, 6),
+                    (-1, 7),
+                    (3, 8),
+                ],
+            ),
+            # ... fewer, longer runs at the cost of a mismatch when opening a gap is dear
+            (
+                [60, 62, 64, 70],
+                [60, 61, 62, 63, 64, 65, 66, 67, 70],
+                -4,
+                -1,
+                [
+                    (0, 0),
+                    (-1, 1),
+                    (-1, 2),
+                    (1, 3),
+                    (2, 4),
+                    (-1, 5),
+                    (-1, 6),
+                    (-1, 7),
+                    (3, 8),
+                ],
+            ),
+        ]
+        table = sim_table(1, -12)
+        for p, s, gap_open, gap_extend, want in cases:
+            pa = np.array(p, dtype=np.int64)
+            sa = np.array(s, dtype=np.int64)
+            H, D = fill_affine(pa, sa, table, gap_open, gap_extend)
+            got = list(traceback_affine(D))
+            self.assertEqual(want, got)
+            self.assertEqual(
+                int(H[len(p), len(s)]),
+                affine_path_score(got, pa, sa, table, gap_open, gap_extend),
+            )
+
+    def test_linear_same_as_fill(self):
+        rng = np.random.default_rng(0)
+        table = sim_table(1, -12)
+        for _ in range(50):
+            p = rng.integers(58, 66, rng.integers(0, 20))
+            s = rng.integers(58, 66, rng.integers(0, 20))
+            H, D = fill(p, s, 1, -1, -12)
+            H_affine, D_affine = fill_affine(p, s, table, -1, -1)
+            np.testing.assert_array_equal(H, H_affine)
+            self.assertEqual(traceback(D), list(traceback_affine(D_affine)))
+
+    def test_gap_open_above_extend(self):
+        with self.assertRaises(ValueError):
+            fill_affine(np.array([60]), np.array([60]), sim_table(1, -12), -1, -2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
 from typing import List, Tuple
 from utils.sharedtypes import NoteInfo
-from align import sort_parallel_voices, ASMAligner, Alignment
+from align import align_many, sort_parallel_voices, ASMAligner, Alignment
+from utils.repr import alignment_repr, alignment_stats_repr
 
 
 class TestASMAligner(unittest.TestCase):
@@ -122,9 +123,92 @@ class TestASMAligner(unittest.TestCase):
             ),
         ]
         for P, S, want in cases:
-            aligner = ASMAligner(P, S, -1)
-            got = aligner.get_alignment()
-            self.assertEqual(want, got)
+            for mode in [
+                "dense",
+                "hirschberg",
+                "banded",
+                "wavefront",
+                "tiled",
+                "anchored",
+                "ond",
+                "xdrop",
+                "packed",
+                "tempo",
+            ]:
+                aligner = ASMAligner(P, S, -1, mode)
+                got = aligner.get_alignment()
+                self.assertEqual(want, got)
+            self.assertEqual(want, list(ASMAligner(P, S, -1).iter_alignment()))
+            # bands too narrow at first
+            for band, band_ms in [(1, None), (None, 1.0)]:
+                aligner = ASMAligner(P, S, -1, "banded", band, band_ms)
+                got = aligner.get_alignment()
+                self.assertEqual(want, got)
+
+    def test_align_long(self):
+        # deep enough to overflow a recursive fill/traceback
+        P: List[NoteInfo] = [
+            {"note_start": 10 * i, "midi_note_num": 40 + (i * 7) % 41}
+            for i in range(3000)
+        ]
+        S: List[NoteInfo] = [
+            {"note_start": 20 * i, "midi_note_num": n["midi_note_num"]}
+            for i, n in enumerate(P)
+        ]
+        want: Alignment = [{"p": p, "s": s} for p, s in zip(P, S)]
+        aligner = ASMAligner(P, S, -1)
+        got = aligner.get_alignment()
+        self.assertEqual(want, got)
+
+    def test_get_stats(self):
+        P: List[NoteInfo] = [
+            {"note_start": 10 * i, "midi_note_num": n}
+            for i, n in enumerate([60, 62, 64, 65, 67, 69, 71, 72, 90])
+        ]
+        S: List[NoteInfo] = [
+            {"note_start": 10 * i, "midi_note_num": n}
+            for i, n in enumerate([60, 64, 66, 67, 69, 71, 72, 74, 76])
+        ]
+        aligner = ASMAligner(P, S, -1)
+        alignment = aligner.get_alignment()
+        _, stderr = alignment_repr(alignment)
+        got = aligner.get_stats()
+        self.assertEqual(aligner.alignment_score(alignment), got["score"])
+        self.assertEqual(stderr, alignment_stats_repr(got).split("\n", 1)[1])
+
+    def test_align_many(self):
+        pairs: List[Tuple[List[NoteInfo], List[NoteInfo]]] = [
+            (
+                [
+                    {"note_start": 10 * i, "midi_note_num": 40 + (i * k) % 41}
+                    for i in range(n)
+                ],
+                [
+                    {"note_start": 20 * i, "midi_note_num": 40 + (i * k + i % 5) % 41}
+                    for i in range(n + k)
+                ],
+            )
+            for n, k in [(30, 3), (200, 7), (0, 2), (90, 5)]
+        ]
+        for mode in ["dense", "tiled"]:
+            got = dict(align_many(pairs, 0, 2, mode=mode))
+            self.assertEqual(len(pairs), len(got))
+            for x, (P, S) in enumerate(pairs):
+                self.assertEqual(ASMAligner(P, S, 0).get_alignment(), got[x])
+
+    def test_get_alignments(self):
+        P: List[NoteInfo] = [
+            {"note_start": 10 * i, "midi_note_num": n}
+            for i, n in enumerate([60, 62, 64, 65, 67, 69, 71, 72, 90])
+        ]
+        S: List[NoteInfo] = [
+            {"note_start": 10 * i, "midi_note_num": n}
+            for i, n in enumerate([60, 64, 62, 67, 65, 69, 72, 71, 76])
+        ]
+        thresholds = [-1, 0, 10, 50]
+        got = ASMAligner(P, S, -1).get_alignments(thresholds)
+        for threshold_ms, alignment in zip(thresholds, got):
+            self.assertEqual(ASMAligner(P, S, threshold_ms).get_alignment(), alignment)
 
 
 class TestSortParallelVoices(unittest.TestCase):
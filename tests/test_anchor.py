@@ -0,0 +1,47 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.anchor import Anchor, align_anchored, find_anchors
+from utils.dp import fill, path_score
+
+
+class TestFindAnchors(unittest.TestCase):
+    def test_find_anchors(self):
+        cases: List[Tuple[List[int], List[int], int, List[Anchor]]] = [
+            ([], [], 2, []),
+            ([60, 62], [60, 62], 3, []),
+            # unique seeds on one diagonal merge into one run
+            ([60, 62, 64, 65], [60, 62, 64, 65], 2, [(0, 0, 4)]),
+            # repeated 2-grams are not anchors
+            ([60, 62, 60, 62, 64], [60, 62, 64], 2, [(3, 1, 2)]),
+            # crossing seeds: only the longest chain is kept
+            ([1, 2, 3, 4, 5, 6], [5, 6, 1, 2, 3, 4], 2, [(0, 2, 4)]),
+            # overlapping seeds on different diagonals are trimmed
+            ([1, 2, 3, 9, 3, 4, 5], [1, 2, 3, 4, 5], 3, [(0, 0, 3), (5, 3, 2)]),
+        ]
+        for p, s, k, want in cases:
+            got = find_anchors(np.array(p), np.array(s), k)
+            self.assertEqual(want, got)
+
+
+class TestAlignAnchored(unittest.TestCase):
+    def test_align_anchored(self):
+        rng = np.random.default_rng(0)
+        for n in [0, 10, 300, 1000]:
+            s = rng.integers(40, 80, n)
+            p = s.copy()
+            # wrong, missing and extra notes
+            p[rng.choice(n, n // 20, replace=False)] += 1
+            p = np.delete(p, rng.choice(n, n // 20, replace=False))
+            p = np.insert(p, rng.integers(0, len(p) + 1, n // 20), 90)
+
+            path = align_anchored(p, s, 1, -1, -12, 6, 2)
+            self.assertEqual(list(range(len(p))), [x for x, _ in path if x >= 0])
+            self.assertEqual(list(range(n)), [y for _, y in path if y >= 0])
+
+            H, _ = fill(p, s, 1, -1, -12)
+            self.assertEqual(int(H[len(p), n]), path_score(path, p, s, 1, -1, -12))
+
+
+if __name__ == "__main__":
+    unittest.main()
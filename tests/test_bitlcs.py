@@ -0,0 +1,41 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.bitlcs import align_lcs, lcs_length
+from utils.dp import IndexPair, fill, traceback
+
+
+class TestAlignLCS(unittest.TestCase):
+    def test_align_lcs(self):
+        cases: List[Tuple[List[int], List[int], List[IndexPair]]] = [
+            ([], [], []),
+            ([60], [], [(0, -1)]),
+            ([], [60], [(-1, 0)]),
+            ([60, 62, 64], [60, 62, 64], [(0, 0), (1, 1), (2, 2)]),
+            # mismatches become a gap on each side
+            ([60, 61, 64], [60, 62, 64], [(0, 0), (-1, 1), (1, -1), (2, 2)]),
+            (
+                [60, 64, 62, 67],
+                [60, 62, 64, 65, 67],
+                [(0, 0), (-1, 1), (1, 2), (-1, 3), (2, -1), (3, 4)],
+            ),
+        ]
+        for p, s, want in cases:
+            got = list(
+                align_lcs(np.array(p, dtype=np.int64), np.array(s, dtype=np.int64))
+            )
+            self.assertEqual(want, got)
+
+    def test_same_as_traceback(self):
+        # exact matches only: equal notes score 1, gaps 0, mismatches never pay
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            p = rng.integers(58, 63, rng.integers(0, 30))
+            s = rng.integers(58, 63, rng.integers(0, 30))
+            H, D = fill(p, s, 1, 0, -1)
+            self.assertEqual(traceback(D), list(align_lcs(p, s)))
+            self.assertEqual(int(H[len(p), len(s)]), lcs_length(p, s))
+
+
+if __name__ == "__main__":
+    unittest.main()
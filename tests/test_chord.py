@@ -0,0 +1,53 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.chord import onset_groups, align_groups
+from utils.dp import IndexPair
+
+
+class TestOnsetGroups(unittest.TestCase):
+    def test_onset_groups(self):
+        cases: List[Tuple[List[float], float, List[Tuple[int, int]]]] = [
+            ([], 0, []),
+            ([0], 0, [(0, 1)]),
+            ([0, 0, 10, 20, 20, 20], 0, [(0, 2), (2, 3), (3, 6)]),
+            ([0, 5, 10, 30, 61], 10, [(0, 3), (3, 4), (4, 5)]),
+        ]
+        for times, tolerance_ms, want in cases:
+            got = onset_groups(np.array(times), tolerance_ms)
+            self.assertEqual(want, got)
+
+
+class TestAlignGroups(unittest.TestCase):
+    def test_align_groups(self):
+        cases: List[
+            Tuple[List[int], List[float], List[int], List[float], List[IndexPair]]
+        ] = [
+            # rolled chord in the performance
+            (
+                [48, 64, 60, 67, 72],
+                [0, 10, 20, 30, 500],
+                [48, 60, 64, 67, 72],
+                [0, 0, 0, 0, 1000],
+                [(0, 0), (1, 2), (2, 1), (3, 3), (4, 4)],
+            ),
+            # missing chord note, wrong chord note and an extra chord
+            (
+                [60, 64, 61, 50, 52],
+                [0, 0, 500, 1000, 1000],
+                [60, 64, 67, 62, 65],
+                [0, 0, 0, 1000, 1000],
+                [(0, 0), (1, 1), (-1, 2), (2, -1), (3, -1), (4, -1), (-1, 3), (-1, 4)],
+            ),
+        ]
+        for p, p_times, s, s_times, want in cases:
+            got = align_groups(
+                np.array(p),
+                np.array(p_times),
+                np.array(s),
+                np.array(s_times),
+                1,
+                -1,
+                -12,
+            )
+            self.assertEqual(want, got)
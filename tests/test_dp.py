@@ -0,0 +1,127 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.dp import (
+    band_by_notes,
+    fill,
+    fill_banded,
+    fill_wavefront,
+    hirschberg,
+    iter_traceback,
+    score_only,
+    sim_table,
+    touches_band_edge,
+    traceback,
+    traceback_banded,
+)
+
+
+class TestHirschberg(unittest.TestCase):
+    def test_same_as_traceback(self):
+        cases: List[Tuple[List[int], List[int]]] = [
+            ([], []),
+            ([60], []),
+            ([], [60]),
+            ([60, 62, 64], [60, 62, 64]),
+            ([0, 1, 2, 3, 0, 1, 4], [0, 2, 3, 3, 2, 1, 2]),
+            # many ties between co-optimal paths
+            ([60, 60, 61, 60, 61, 61, 60], [61, 60, 60, 61, 61, 60]),
+            ([60, 62, 60, 62, 64, 65, 67, 60, 62], [62, 60, 64, 64, 65, 60, 67, 62]),
+        ]
+        for p, s in cases:
+            pa = np.array(p, dtype=np.int64)
+            sa = np.array(s, dtype=np.int64)
+            _, D = fill(pa, sa, 1, -1, -12)
+            want = traceback(D)
+            # max_cells=1 forces splitting down to single rows
+            got = hirschberg(pa, sa, 1, -1, -12, max_cells=1)
+            self.assertEqual(want, got)
+
+
+class TestScoreOnly(unittest.TestCase):
+    def test_same_as_traceback(self):
+        cases: List[Tuple[List[int], List[int]]] = [
+            ([], []),
+            ([60], []),
+            ([], [60, 61]),
+            ([60, 62, 64], [60, 63, 64]),
+            ([60, 60, 61, 60, 61, 61, 60], [61, 60, 60, 61, 61, 60]),
+            ([60, 62, 60, 62, 64, 65, 67, 60, 62], [62, 60, 64, 64, 65, 60, 67, 62]),
+            ([40, 80, 41, 81], [80, 40, 81, 41, 60]),
+        ]
+        for p, s in cases:
+            pa = np.array(p, dtype=np.int64)
+            sa = np.array(s, dtype=np.int64)
+            H, D = fill(pa, sa, 1, -1, -12)
+            path = traceback(D)
+            want = (
+                int(H[len(p), len(s)]),
+                sum(1 for x, y in path if x >= 0 and y >= 0 and p[x] != s[y]),
+                sum(1 for x, _ in path if x < 0),
+            )
+            got = score_only(pa, sa, 1, -1, -12)
+            self.assertEqual(want, got)
+
+
+class TestFillBanded(unittest.TestCase):
+    def test_full_band_same_as_fill(self):
+        p = np.array([0, 1, 2, 3, 0, 1, 4], dtype=np.int64)
+        s = np.array([0, 2, 3, 3, 2, 1, 2, 5, 6], dtype=np.int64)
+        H, D = fill(p, s, 1, -1, -12)
+        lo, hi = band_by_notes(len(p), len(s), len(s))
+        Hb, Db = fill_banded(p, s, lo, hi, 1, -1, -12)
+        self.assertEqual(H.tolist(), Hb.tolist())
+        self.assertEqual(traceback(D), traceback_banded(Db, lo, len(s)))
+
+    def test_band_edge(self):
+        p = np.array([60, 62, 64, 65], dtype=np.int64)
+        s = np.array([50, 51, 52, 60, 62, 64, 65], dtype=np.int64)
+        lo, hi = band_by_notes(len(p), len(s), 1)
+        _, D = fill_banded(p, s, lo, hi, 1, -1, -12)
+        self.assertTrue(touches_band_edge(traceback_banded(D, lo, len(s)), lo, hi, 7))
+
+        lo, hi = band_by_notes(len(p), len(s), 4)
+        _, D = fill_banded(p, s, lo, hi, 1, -1, -12)
+        path = traceback_banded(D, lo, len(s))
+        self.assertFalse(touches_band_edge(path, lo, hi, len(s)))
+        self.assertEqual(
+            [(-1, 0), (-1, 1), (-1, 2), (0, 3), (1, 4), (2, 5), (3, 6)], path
+        )
+
+
+class TestFillWavefront(unittest.TestCase):
+    def test_same_as_fill(self):
+        cases: List[Tuple[List[int], List[int]]] = [
+            ([], []),
+            ([60], []),
+            ([], [60]),
+            ([0, 1, 2, 3, 0, 1, 4], [0, 2, 3, 3, 2, 1, 2]),
+            ([10, 127, 60], [100, 0, 60, 61, 62]),
+        ]
+        table = sim_table(1, -12)
+        for p, s in cases:
+            pa = np.array(p, dtype=np.int64)
+            sa = np.array(s, dtype=np.int64)
+            H, D = fill(pa, sa, 1, -1, -12)
+            Hw, Dw = fill_wavefront(pa, sa, table, -1)
+            self.assertEqual(H.tolist(), Hw.tolist())
+            self.assertEqual(D.tolist(), Dw.tolist())
+
+
+class TestTraceback(unittest.TestCase):
+    def test_iter_traceback(self):
+        p = np.array([0, 1, 2, 3, 0, 1, 4], dtype=np.int64)
+        s = np.array([0, 2, 3, 3, 2, 1, 2], dtype=np.int64)
+        _, D = fill(p, s, 1, -1, -12)
+        want: List[Tuple[int, int]] = [
+            (0, 0),
+            (1, -1),
+            (2, 1),
+            (-1, 2),
+            (3, 3),
+            (4, 4),
+            (5, 5),
+            (6, 6),
+        ]
+        self.assertEqual(want, list(iter_traceback(D)))
+        self.assertEqual(want, traceback(D))
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.local import align_local, fill_local, seed_windows, traceback_local
+from utils.dp import IndexPair
+
+
+class TestAlignLocal(unittest.TestCase):
+    def test_align_local(self):
+        cases: List[Tuple[List[int], List[int], List[IndexPair]]] = [
+            ([], [], []),
+            ([60], [], []),
+            ([60], [70], []),
+            # excerpt in the middle of the score
+            ([64, 65, 67], [60, 62, 64, 65, 67, 69], [(0, 2), (1, 3), (2, 4)]),
+            # wrong notes at the ends of the excerpt are left out
+            (
+                [50, 64, 65, 66, 67, 69, 80],
+                [60, 62, 64, 65, 67, 69],
+                [(1, 2), (2, 3), (3, -1), (4, 4), (5, 5)],
+            ),
+        ]
+        for p, s, want in cases:
+            got = align_local(
+                np.array(p, dtype=np.int64), np.array(s, dtype=np.int64), 1, -1, -12, 2
+            )
+            self.assertEqual(want, got)
+
+    def test_same_as_full_search(self):
+        rng = np.random.default_rng(0)
+        s = rng.integers(40, 80, 2000)
+        for start in [0, 700, 1950]:
+            p = s[start : start + 50].copy()
+            p[::7] += 1
+            H, D = fill_local(p, s, 1, -1, -12)
+            self.assertEqual(traceback_local(H, D), align_local(p, s, 1, -1, -12))
+            self.assertLess(
+                sum(b - a for a, b in seed_windows(p, s, 4, 3)), len(s) // 4
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.multires import align_multires
+from utils.dp import fill, path_score
+
+
+class TestAlignMultires(unittest.TestCase):
+    def test_align_multires(self):
+        rng = np.random.default_rng(0)
+        cases: List[Tuple[int, int, float]] = [
+            # (performance notes, score notes, performance time jitter (ms))
+            (0, 0, 0),
+            (0, 10, 0),
+            (10, 0, 0),
+            (50, 50, 0),
+            (400, 380, 20),
+            (1000, 1100, 40),
+        ]
+        for n, m, jitter in cases:
+            s = rng.integers(40, 80, m)
+            s_times = np.sort(rng.integers(0, 50, m)).cumsum().astype(float)
+            # performance: score with some notes dropped, some added, some jitter
+            keep = np.sort(rng.choice(m, min(n, m), replace=False))
+            p = s[keep]
+            p_times = s_times[keep] + rng.uniform(0, jitter, len(keep))
+            extra = n - len(keep)
+            if extra > 0:
+                p = np.concatenate([p, rng.integers(40, 80, extra)])
+                p_times = np.concatenate(
+                    [p_times, rng.uniform(0, max(1.0, s_times[-1]), extra)]
+                    if m > 0
+                    else [p_times, rng.uniform(0, 1000, extra)]
+                )
+                order = np.argsort(p_times, kind="stable")
+                p = p[order]
+                p_times = p_times[order]
+
+            path = align_multires(p, p_times, s, s_times, 1, -1, -12)
+            self.assertEqual(list(range(n)), sorted(x for x, _ in path if x >= 0))
+            self.assertEqual(list(range(m)), sorted(y for _, y in path if y >= 0))
+
+            # not guaranteed optimal, but close on performance-like input
+            H, _ = fill(p, s, 1, -1, -12)
+            score = path_score(path, p, s, 1, -1, -12)
+            self.assertLessEqual(score, int(H[n, m]))
+            self.assertLessEqual(int(H[n, m]) - score, (n + m) // 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
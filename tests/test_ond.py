@@ -0,0 +1,52 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Optional, Tuple
+from utils.ond import align_ond, diff_count
+from utils.dp import fill, traceback
+
+
+class TestDiffCount(unittest.TestCase):
+    def test_diff_count(self):
+        cases: List[Tuple[List[int], List[int], int, Optional[int]]] = [
+            ([], [], 0, 0),
+            ([60], [], 1, 1),
+            ([], [60, 62], 1, None),
+            ([60, 62, 64], [60, 62, 64], 0, 0),
+            # a wrong note is one deletion from each
+            ([60, 61, 64], [60, 62, 64], 2, 2),
+            ([60, 61, 64], [60, 62, 64], 1, None),
+            ([60, 64, 62, 67], [60, 62, 64, 65, 67], 10, 3),
+        ]
+        for p, s, max_d, want in cases:
+            got = diff_count(np.array(p), np.array(s), max_d)
+            self.assertEqual(want, got)
+
+
+class TestAlignOND(unittest.TestCase):
+    def test_same_as_traceback(self):
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            s = rng.integers(58, 66, rng.integers(0, 60))
+            p = s.copy()
+            # a few wrong, missing and extra notes
+            for _ in range(rng.integers(0, 6)):
+                k = rng.integers(0, len(p) + 1)
+                op = rng.integers(0, 3)
+                if op == 0:
+                    p = np.insert(p, k, rng.integers(58, 66))
+                elif k < len(p) and op == 1:
+                    p = np.delete(p, k)
+                elif k < len(p):
+                    p[k] = rng.integers(58, 66)
+            _, D = fill(p, s, 1, -1, -12)
+            self.assertEqual(traceback(D), align_ond(p, s, 1, -1, -12, 100))
+
+    def test_too_many_diffs(self):
+        p = np.array([60, 61, 62, 63])
+        s = np.array([70, 71, 72, 73])
+        self.assertIsNone(align_ond(p, s, 1, -1, -12, 7))
+        self.assertIsNotNone(align_ond(p, s, 1, -1, -12, 8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+import numpy as np  # type: ignore
+from utils.packed import align_packed, fill_packed, packed_shape, traceback_packed
+from utils.dp import fill, traceback
+
+
+class TestPacked(unittest.TestCase):
+    def test_same_as_traceback(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            p = rng.integers(58, 64, rng.integers(0, 30))
+            s = rng.integers(58, 64, rng.integers(0, 30))
+            _, D = fill(p, s, 1, -1, -12)
+            self.assertEqual(traceback(D), align_packed(p, s, 1, -1, -12))
+
+    def test_fill_packed(self):
+        p = np.array([60, 62, 64, 65, 67], dtype=np.int64)
+        s = np.array([60, 64, 65, 66, 67, 69], dtype=np.int64)
+        self.assertEqual((6, 2), packed_shape(len(p), len(s)))
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "D")
+            D = np.memmap(path, dtype=np.uint8, mode="w+", shape=packed_shape(5, 6))
+            fill_packed(p, s, 1, -1, -12, D)
+            D.flush()
+            del D
+            # a quarter of a byte per cell
+            self.assertEqual(12, os.path.getsize(path))
+            D = np.memmap(path, dtype=np.uint8, mode="r", shape=packed_shape(5, 6))
+            got = traceback_packed(D, len(s))
+            del D
+        self.assertEqual(traceback(fill(p, s, 1, -1, -12)[1]), got)
+
+
+if __name__ == "__main__":
+    unittest.main()
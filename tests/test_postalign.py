@@ -1,6 +1,6 @@
 import unittest
 from typing import List, Tuple
-from utils.sharedtypes import Alignment
+from utils.sharedtypes import Alignment, NoteInfo
 from utils.postalign import PostAlign
 
 
@@ -858,3 +858,91 @@ class TestPostAlign(unittest.TestCase):
             pa = PostAlign(alignment, threshold_ms)
             got = pa.postalign()
             self.assertEqual(want, got)
+
+    def test_lookforward_limit(self):
+        for k, limit, swapped in [(99, 100, True), (100, 100, False), (100, 101, True)]:
+            # a mismatch, k - 1 matches, then a gap matching the mismatch's perf note
+            alignment: Alignment = (
+                [
+                    {
+                        "p": {"note_start": 0, "midi_note_num": 10},
+                        "s": {"note_start": 0, "midi_note_num": 20},
+                    }
+                ]
+                + [
+                    {
+                        "p": {"note_start": 0, "midi_note_num": 30},
+                        "s": {"note_start": 0, "midi_note_num": 30},
+                    }
+                    for _ in range(k - 1)
+                ]
+                + [{"p": None, "s": {"note_start": 0, "midi_note_num": 10}}]
+            )
+            got = PostAlign(alignment, 50, limit).postalign()
+            self.assertEqual(len(alignment), len(got))
+            self.assertEqual(10 if swapped else 20, got[0]["s"]["midi_note_num"])
+
+    def test_from_path(self):
+        P: List[NoteInfo] = [
+            {"note_start": 10 * i, "midi_note_num": n}
+            for i, n in enumerate([60, 62, 64, 67, 65])
+        ]
+        S: List[NoteInfo] = [
+            {"note_start": 10 * i, "midi_note_num": n}
+            for i, n in enumerate([60, 64, 62, 65, 67, 69])
+        ]
+        path = [(0, 0), (1, 1), (2, 2), (-1, 3), (3, 4), (4, -1), (-1, 5)]
+        alignment: Alignment = [
+            {"p": P[x] if x >= 0 else None, "s": S[y] if y >= 0 else None}
+            for x, y in path
+        ]
+        want = PostAlign(alignment, 50).postalign()
+        got = PostAlign.from_path(path, P, S, 50).postalign()
+        self.assertEqual(want, got)
+        self.assertEqual(
+            [(0, 0), (1, 2), (2, 1), (3, 4), (4, 3), (-1, 5)],
+            PostAlign.from_path(path, P, S, 50).postalign_path(),
+        )
+        # notes are not copied
+        self.assertIs(S[2], got[1]["s"])
+
+    def test_segments(self):
+        # chords 1s apart, each with its score notes in the wrong order
+        P: List[NoteInfo] = []
+        S: List[NoteInfo] = []
+        for t in range(12):
+            for n in [60, 64, 67]:
+                P.append({"note_start": 1000 * t, "midi_note_num": n})
+            for n in [67, 60, 64]:
+                S.append({"note_start": 1000 * t, "midi_note_num": n})
+        path = [(i, i) for i in range(len(P))]
+
+        pa = PostAlign.from_path(path, P, S, 500)
+        self.assertEqual([(3 * t, 1000) for t in range(1, 12)], pa._segments())
+        self.assertEqual([], PostAlign.from_path(path, P, S, 1000)._segments())
+
+        want = PostAlign.from_path(path, P, S, 500).postalign()
+        got = PostAlign.from_path(path, P, S, 500, workers=2).postalign()
+        self.assertEqual(want, got)
+        self.assertEqual(len(P), sum(el["p"] == el["s"] for el in got))
+
+    def test_sweep(self):
+        P: List[NoteInfo] = []
+        S: List[NoteInfo] = []
+        for t in range(8):
+            for n in [60, 64, 67]:
+                P.append({"note_start": 1000 * t, "midi_note_num": n})
+            # score notes of each chord in the wrong order, spread over t ms
+            for k, n in enumerate([67, 60, 64]):
+                S.append({"note_start": 1000 * t + 100 * t * k, "midi_note_num": n})
+        path = [(i, i) for i in range(len(P))]
+        alignment: Alignment = [{"p": P[x], "s": S[y]} for x, y in path]
+
+        thresholds = [500, -1, 0, 100, 250, 1000, 2000, 0]
+        got = PostAlign(alignment, 0).sweep(thresholds)
+        for threshold_ms, alignment_at in zip(thresholds, got):
+            if threshold_ms < 0:
+                self.assertEqual(alignment, alignment_at)
+            else:
+                want = PostAlign(alignment, threshold_ms).postalign()
+                self.assertEqual(want, alignment_at)
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from typing import List
+from utils.scoreindex import ScoreIndex
+from utils.sharedtypes import NoteInfo
+
+
+def notes(pitches: List[List[int]]) -> List[NoteInfo]:
+    # one onset (100ms apart) per list of pitches
+    return [
+        {"note_start": 100.0 * t, "midi_note_num": n}
+        for t, chord in enumerate(pitches)
+        for n in chord
+    ]
+
+
+class TestScoreIndex(unittest.TestCase):
+    def test_lookup(self):
+        index = ScoreIndex(3)
+        index.add("a", notes([[60], [62], [64], [65], [67], [69], [71], [72]]))
+        index.add("b", notes([[48, 52, 55], [50], [53, 57], [59], [60], [48]]))
+
+        # transposed
+        got = index.lookup(notes([[66], [67], [69], [71]]), 1)
+        self.assertEqual(
+            [{"name": "a", "position": 2, "note_start": 200.0, "votes": 2}], got
+        )
+
+        # chord notes in another order, played slightly apart
+        fragment: List[NoteInfo] = [
+            {"note_start": 0, "midi_note_num": 62},
+            {"note_start": 100, "midi_note_num": 69},
+            {"note_start": 120, "midi_note_num": 65},
+            {"note_start": 200, "midi_note_num": 71},
+        ]
+        got = index.lookup(fragment, 1)
+        self.assertEqual(
+            [{"name": "b", "position": 3, "note_start": 100.0, "votes": 2}], got
+        )
+
+        self.assertEqual([], index.lookup(notes([[60], [70], [61]])))
+
+    def test_save_load(self):
+        index = ScoreIndex(3)
+        index.add("a", notes([[60], [62], [64], [65], [67]]))
+        fragment = notes([[62], [64], [65]])
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "index.json")
+            index.save(path)
+            loaded = ScoreIndex.load(path)
+        self.assertEqual(index.lookup(fragment), loaded.lookup(fragment))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import random
+import tempfile
+import unittest
+from typing import List
+from utils.sketch import SketchLibrary, cosine, jaccard, sketch
+from utils.sharedtypes import NoteInfo
+
+
+def notes(pitches: List[int]) -> List[NoteInfo]:
+    # one note every 100ms
+    return [
+        {"note_start": 100.0 * t, "midi_note_num": n} for t, n in enumerate(pitches)
+    ]
+
+
+class TestSketch(unittest.TestCase):
+    def test_similarity(self):
+        rng = random.Random(0)
+        a = [rng.randrange(48, 84) for _ in range(400)]
+        b = [rng.randrange(48, 84) for _ in range(400)]
+        # a with a tenth of its notes changed
+        a2 = [rng.randrange(48, 84) if rng.random() < 0.1 else n for n in a]
+
+        sa = sketch(notes(a))
+        self.assertEqual(1.0, jaccard(sa, sketch(notes(a))))
+        self.assertAlmostEqual(1.0, cosine(sa, sketch(notes(a))))
+        self.assertGreater(jaccard(sa, sketch(notes(a2))), 0.3)
+        self.assertLess(jaccard(sa, sketch(notes(b))), 0.1)
+
+        # nothing to shingle
+        self.assertEqual(0.0, jaccard(sketch(notes([60])), sketch(notes([60]))))
+        self.assertEqual(0.0, jaccard(sketch([]), sa))
+
+    def test_rank(self):
+        rng = random.Random(1)
+        pieces = {str(k): [rng.randrange(48, 84) for _ in range(300)] for k in range(5)}
+        library = SketchLibrary()
+        for name, pitches in pieces.items():
+            library.add(name, notes(pitches))
+        for name, pitches in pieces.items():
+            # performance of an excerpt, with a few wrong notes
+            perf = [n + 1 if rng.random() < 0.05 else n for n in pitches[50:250]]
+            self.assertEqual(name, library.rank(notes(perf))[0]["name"])
+
+    def test_save_load(self):
+        library = SketchLibrary(3)
+        library.add("a", notes([60, 62, 64, 65, 67]))
+        library.add("b", notes([60, 59, 57, 55, 53]))
+        query = notes([62, 64, 65, 67])
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "library.json")
+            library.save(path)
+            loaded = SketchLibrary.load(path)
+        self.assertEqual(library.rank(query), loaded.rank(query))
+        self.assertEqual("a", loaded.rank(query)[0]["name"])
+
+
+if __name__ == "__main__":
+    unittest.main()
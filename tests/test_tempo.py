@@ -0,0 +1,56 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.tempo import band_by_tempo, tempo_map
+
+
+class TestTempoMap(unittest.TestCase):
+    def test_tempo_map(self):
+        # performance at half speed for the first half, then in time
+        s = np.array([60, 62, 64, 65, 67, 69, 71, 72])
+        s_times = np.arange(8) * 100.0
+        p_times = np.array([0, 200, 400, 600, 700, 800, 900, 1000], dtype=np.float64)
+        knots = tempo_map(s, p_times, s, s_times, 2)
+        np.testing.assert_array_equal(p_times, knots[0])
+        np.testing.assert_array_equal(s_times, knots[1])
+
+    def test_no_anchors(self):
+        p = np.array([60, 61])
+        s = np.array([70, 71, 72])
+        knots = tempo_map(p, np.array([0.0, 1000.0]), s, np.array([0.0, 50.0, 500.0]))
+        np.testing.assert_array_equal([0, 1000], knots[0])
+        np.testing.assert_array_equal([0, 500], knots[1])
+
+
+class TestBandByTempo(unittest.TestCase):
+    def test_band_by_tempo(self):
+        cases: List[Tuple[List[float], List[float], float, List[int], List[int]]] = [
+            ([], [], 100, [0], [0]),
+            ([0, 100, 200], [], 100, [0, 0, 0, 0], [0, 0, 0, 0]),
+            (
+                [0, 100, 200, 300],
+                [0, 100, 200, 300],
+                50,
+                [0, 0, 1, 2, 3],
+                [0, 1, 2, 3, 4],
+            ),
+            (
+                [0, 100, 200, 300],
+                [0, 100, 200, 300],
+                150,
+                [0, 0, 0, 1, 2],
+                [0, 2, 3, 4, 4],
+            ),
+        ]
+        for p_times, s_times, tolerance_ms, want_lo, want_hi in cases:
+            pt = np.array(p_times, dtype=np.float64)
+            st = np.array(s_times, dtype=np.float64)
+            # in time
+            knots = (np.array([0.0, 1000.0]), np.array([0.0, 1000.0]))
+            lo, hi = band_by_tempo(pt, st, knots, tolerance_ms)
+            self.assertEqual(want_lo, lo.tolist())
+            self.assertEqual(want_hi, hi.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.dp import fill, sim_table, traceback
+from utils.tiled import tiled
+
+
+class TestTiled(unittest.TestCase):
+    def test_same_as_traceback(self):
+        cases: List[Tuple[List[int], List[int], int]] = [
+            ([], [], 2),
+            ([60], [], 2),
+            ([], [60], 2),
+            ([0, 1, 2, 3, 0, 1, 4], [0, 2, 3, 3, 2, 1, 2], 1),
+            ([0, 1, 2, 3, 0, 1, 4], [0, 2, 3, 3, 2, 1, 2], 3),
+            ([60, 60, 61, 60, 61, 61, 60], [61, 60, 60, 61, 61, 60], 4),
+        ]
+        table = sim_table(1, -12)
+        for p, s, tile in cases:
+            pa = np.array(p, dtype=np.int64)
+            sa = np.array(s, dtype=np.int64)
+            _, D = fill(pa, sa, 1, -1, -12)
+            got = tiled(pa, sa, table, -1, workers=2, tile=tile)
+            self.assertEqual(traceback(D), list(got))
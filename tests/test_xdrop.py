@@ -0,0 +1,46 @@
+import unittest
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from utils.xdrop import align_xdrop
+from utils.dp import IndexPair, fill, sim_table, traceback
+
+
+class TestAlignXdrop(unittest.TestCase):
+    def test_align_xdrop(self):
+        cases: List[Tuple[List[int], List[int], int, List[IndexPair], int]] = [
+            ([], [], 0, [], 1),
+            ([60], [], 0, [(0, -1)], 2),
+            ([], [60], 0, [(-1, 0)], 2),
+            ([60, 62, 64], [60, 62, 64], 0, [(0, 0), (1, 1), (2, 2)], 14),
+            # x = 0 keeps only the best cells of each anti-diagonal
+            ([60, 61, 64], [60, 62, 64], 0, [(0, 0), (1, 1), (2, 2)], 14),
+            ([60, 61, 64], [60, 62, 64], 100, [(0, 0), (1, 1), (2, 2)], 16),
+            (
+                [60, 62, 64, 65, 67],
+                [60, 62, 64, 65, 67],
+                0,
+                [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)],
+                24,
+            ),
+        ]
+        table = sim_table(1, -12)
+        for p, s, x, want, want_computed in cases:
+            got, computed = align_xdrop(
+                np.array(p, dtype=np.int64), np.array(s, dtype=np.int64), table, -1, x
+            )
+            self.assertEqual(want, got)
+            self.assertEqual(want_computed, computed)
+
+    def test_no_pruning_same_as_traceback(self):
+        rng = np.random.default_rng(0)
+        table = sim_table(1, -12)
+        for _ in range(100):
+            p = rng.integers(58, 64, rng.integers(0, 30))
+            s = rng.integers(58, 64, rng.integers(0, 30))
+            _, D = fill(p, s, 1, -1, -12)
+            got, _ = align_xdrop(p, s, table, -1, 1 << 20)
+            self.assertEqual(traceback(D), got)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import numpy as np  # type: ignore
+from typing import Iterable, Iterator, Tuple
+from .dp import DIAG, DOWN, LEFT, NEG_INF, IndexPair, replay
+
+# extra traceback bits: the gap at this cell extends a gap from the previous cell
+# (rather than opening after a match or the other kind of gap)
+X_EXT = 8  # gap in score, continued from the cell above
+Y_EXT = 16  # gap in performance, continued from the cell to the left
+
+
+def fill_affine(
+    p: np.ndarray, s: np.ndarray, table: np.ndarray, gap_open: int, gap_extend: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gotoh fill: fill with similarities looked up in table (see sim_table) and a run
+    of k gaps scoring gap_open + (k - 1) * gap_extend.
+
+    The three matrices (ending in a match, a gap in score, a gap in performance)
+    are computed a row at a time; gaps in performance are resolved with a running
+    maximum as in fill, so each row is a fixed number of vector operations.
+    Returns (H, D) with H the best of the three and D holding the direction bits
+    of H plus X_EXT/Y_EXT. Needs gap_open <= gap_extend.
+    """
+    if gap_open > gap_extend:
+        raise ValueError(
+            f"Gap open ({gap_open}) must not score higher than gap extend ({gap_extend})"
+        )
+    n = len(p)
+    m = len(s)
+    H = np.empty((n + 1, m + 1), dtype=np.int32)
+    D = np.empty((n + 1, m + 1), dtype=np.uint8)
+
+    cols = np.arange(m + 1, dtype=np.int64)
+    ramp = cols * gap_extend
+    row = np.empty(m + 1, dtype=np.int64)
+    row[0] = 0
+    row[1:] = gap_open + ramp[:-1]
+    H[0] = row
+    D[0] = DOWN | Y_EXT
+    D[0, 0] = 0
+    D[0, 1:2] = DOWN
+
+    # best score ending in a gap in score
+    x = np.full(m, NEG_INF, dtype=np.int64)
+    a = np.empty(m + 1, dtype=np.int64)
+    y = np.empty(m + 1, dtype=np.int64)
+    y[0] = NEG_INF
+    for i in range(1, n + 1):
+        diag = row[:-1] + table[p[i - 1]].take(s)
+        x_open = row[1:] + gap_open
+        x_ext = x + gap_extend
+        x = np.maximum(x_open, x_ext)
+
+        # best score not ending in a gap in performance
+        a[0] = gap_open + (i - 1) * gap_extend
+        np.maximum(diag, x, out=a[1:])
+        # y[j] = max(a[k] + gap_open + (j - k - 1) * gap_extend) over k < j
+        y[1:] = np.maximum.accumulate(a[:-1] - ramp[:-1]) + ramp[1:]
+        y[1:] += gap_open - gap_extend
+        prev_y = y[:-1] + gap_extend
+        row = np.maximum(a, y)
+
+        D[i, 0] = LEFT | X_EXT if i > 1 else LEFT
+        D[i, 1:] = (
+            (row[1:] == diag) * DIAG
+            | (row[1:] == x) * LEFT
+            | (row[1:] == y[1:]) * DOWN
+            # prefer opening on ties
+            | (x_ext > x_open) * X_EXT
+            | (prev_y > row[:-1] + gap_open) * Y_EXT
+        )
+        H[i] = row
+
+    return H, D
+
+
+def walk_affine(D: np.ndarray) -> bytearray:
+    """
+    walk over the D fill_affine gives, from the bottom-right corner.
+
+    Once in a gap, stays in it while the cell's X_EXT/Y_EXT bit says so.
+    """
+    i = D.shape[0] - 1
+    j = D.shape[1] - 1
+    moves = bytearray()
+    state = 0
+    while i > 0 or j > 0:
+        d = D.item(i, j)
+        if state == 0:
+            if d & DIAG:
+                i -= 1
+                j -= 1
+                moves.append(DIAG)
+                continue
+            state = LEFT if d & LEFT else DOWN
+        moves.append(state)
+        if state == LEFT:
+            i -= 1
+            state = LEFT if d & X_EXT else 0
+        else:
+            j -= 1
+            state = DOWN if d & Y_EXT else 0
+    return moves
+
+
+def traceback_affine(D: np.ndarray) -> Iterator[IndexPair]:
+    """
+    iter_traceback over the D fill_affine gives.
+    """
+    yield from replay(walk_affine(D))
+
+
+def affine_path_score(
+    path: Iterable[IndexPair],
+    p: np.ndarray,
+    s: np.ndarray,
+    table: np.ndarray,
+    gap_open: int,
+    gap_extend: int,
+) -> int:
+    """
+    Score of an alignment path under fill_affine's scoring.
+    """
+    score = 0
+    prev = 0
+    for x, y in path:
+        if x >= 0 and y >= 0:
+            score += int(table[p[x], s[y]])
+            prev = DIAG
+            continue
+        gap = LEFT if y < 0 else DOWN
+        score += gap_extend if prev == gap else gap_open
+        prev = gap
+    return score
@@ -0,0 +1,148 @@
+import os
+import numpy as np  # type: ignore
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .dp import IndexPair, hirschberg
+
+# length of the exact pitch n-grams used as anchors
+DEFAULT_NGRAM = 8
+
+# (P start, S start, length) of a run of equal notes
+Anchor = Tuple[int, int, int]
+
+# (P start, P end, S start, S end) of a gap between anchors
+Segment = Tuple[int, int, int, int]
+
+
+def unique_ngrams(notes: np.ndarray, k: int) -> Dict[bytes, int]:
+    """
+    Start index of each pitch k-gram occurring exactly once in notes.
+    """
+    b = notes.astype(np.uint8).tobytes()
+    seen: Dict[bytes, int] = {}
+    for i in range(len(b) - k + 1):
+        g = b[i : i + k]
+        seen[g] = -1 if g in seen else i
+    return {g: i for g, i in seen.items() if i >= 0}
+
+
+def find_anchors(p: np.ndarray, s: np.ndarray, k: int = DEFAULT_NGRAM) -> List[Anchor]:
+    """
+    Non-overlapping runs of equal notes, in order in both p and s, seeded from
+    k-grams occurring exactly once in each.
+
+    Seeds are chained by a longest increasing subsequence of their score
+    positions, then overlapping seeds on the same diagonal are merged.
+    """
+    if k < 1:
+        raise ValueError(f"n-gram length must be at least 1, got {k}")
+    p_grams = unique_ngrams(p, k)
+    s_grams = unique_ngrams(s, k)
+    seeds = sorted((i, s_grams[g]) for g, i in p_grams.items() if g in s_grams)
+
+    # longest chain with increasing S start, patience sorting
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    prev = [-1] * len(seeds)
+    for idx, (_, j) in enumerate(seeds):
+        t = bisect_left(tails, j)
+        if t == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[t] = j
+            tail_idx[t] = idx
+        prev[idx] = tail_idx[t - 1] if t > 0 else -1
+    chain: List[Tuple[int, int]] = []
+    idx = tail_idx[-1] if len(tail_idx) > 0 else -1
+    while idx >= 0:
+        chain.append(seeds[idx])
+        idx = prev[idx]
+    chain.reverse()
+
+    anchors: List[Anchor] = []
+    for i, j in chain:
+        if len(anchors) > 0:
+            ai, aj, al = anchors[-1]
+            if i - ai == j - aj and i <= ai + al:
+                # same diagonal, overlapping or adjacent: extend
+                anchors[-1] = (ai, aj, i + k - ai)
+                continue
+            # trim the seed to start after the previous anchor on both sides
+            cut = max(0, ai + al - i, aj + al - j)
+            if cut >= k:
+                continue
+            i += cut
+            j += cut
+            anchors.append((i, j, k - cut))
+        else:
+            anchors.append((i, j, k))
+    return anchors
+
+
+def segments(anchors: List[Anchor], n: int, m: int) -> List[Segment]:
+    """
+    The gaps before, between and after anchors, one per anchor plus one.
+    """
+    segs: List[Segment] = []
+    i = 0
+    j = 0
+    for ai, aj, al in anchors:
+        segs.append((i, ai, j, aj))
+        i = ai + al
+        j = aj + al
+    segs.append((i, n, j, m))
+    return segs
+
+
+def align_anchored(
+    p: np.ndarray,
+    s: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+    k: int = DEFAULT_NGRAM,
+    workers: Optional[int] = None,
+) -> List[IndexPair]:
+    """
+    Matches anchors (see find_anchors) note for note and aligns the segments
+    between them independently with hirschberg, spread over a process pool.
+
+    Time is roughly the sum of the squared segment sizes rather than len(p) * len(s).
+    Optimal within each segment, but not guaranteed globally optimal.
+    """
+    anchors = find_anchors(p, s, k)
+    segs = segments(anchors, len(p), len(s))
+    jobs = [(p[a:b], s[c:d], alpha, gamma, beta_hat) for a, b, c, d in segs]
+
+    # largest first, so the pool is not left waiting on a big segment at the end
+    order = sorted(range(len(jobs)), key=lambda x: -len(jobs[x][0]) * len(jobs[x][1]))
+    results: List[List[IndexPair]] = [[] for _ in jobs]
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # many segments are tiny, send them in batches
+        solved = executor.map(
+            _solve_segment,
+            [jobs[x] for x in order],
+            chunksize=max(1, len(jobs) // (4 * workers)),
+        )
+        for x, res in zip(order, solved):
+            results[x] = res
+
+    path: List[IndexPair] = []
+    for x, (a, _, c, _) in enumerate(segs):
+        path.extend(
+            (i + a if i >= 0 else -1, j + c if j >= 0 else -1) for i, j in results[x]
+        )
+        if x < len(anchors):
+            ai, aj, al = anchors[x]
+            path.extend((ai + t, aj + t) for t in range(al))
+    return path
+
+
+def _solve_segment(
+    job: Tuple[np.ndarray, np.ndarray, int, int, int],
+) -> List[IndexPair]:
+    p, s, alpha, gamma, beta_hat = job
+    return hirschberg(p, s, alpha, gamma, beta_hat)
@@ -0,0 +1,92 @@
+import numpy as np  # type: ignore
+from typing import Dict, Iterator, List
+from .dp import DIAG, DOWN, LEFT, IndexPair, replay
+
+
+def match_masks(s: np.ndarray) -> Dict[int, int]:
+    """
+    Bitmask of the positions of each MIDI note number in s, bit j for s[j].
+    """
+    masks: Dict[int, int] = {}
+    for j, note in enumerate(s.tolist()):
+        masks[note] = masks.get(note, 0) | (1 << j)
+    return masks
+
+
+def lcs_rows(p: np.ndarray, s: np.ndarray) -> List[int]:
+    """
+    Bit-parallel longest common subsequence rows (Allison-Dix, Hyyro).
+
+    Row i is a len(s)-bit integer whose zero bits below bit j count the length
+    of the LCS of p[:i] and s[:j]. Each row takes a handful of big integer
+    operations, i.e. one machine word operation per 30-64 score notes.
+    """
+    masks = match_masks(s)
+    full = (1 << len(s)) - 1
+    v = full
+    rows = [v]
+    for note in p.tolist():
+        u = v & masks.get(note, 0)
+        v = ((v + u) | (v - u)) & full
+        rows.append(v)
+    return rows
+
+
+def lcs_length(p: np.ndarray, s: np.ndarray) -> int:
+    """
+    Length of the longest common subsequence of p and s, keeping a single row.
+    """
+    masks = match_masks(s)
+    full = (1 << len(s)) - 1
+    v = full
+    for note in p.tolist():
+        u = v & masks.get(note, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(s) - bin(v).count("1")
+
+
+def align_lcs(p: np.ndarray, s: np.ndarray) -> Iterator[IndexPair]:
+    """
+    Alignment pairing only equal notes, as many as possible, everything else gaps.
+
+    Walks lcs_rows back from the bottom-right corner, preferring a match, then
+    a gap in score, then a gap in performance, as traceback does.
+    """
+    rows = lcs_rows(p, s)
+    pl = p.tolist()
+    sl = s.tolist()
+
+    def lcs(i: int, j: int) -> int:
+        # LCS length of p[:i] and s[:j]
+        return j - bin(rows[i] & ((1 << j) - 1)).count("1")
+
+    def zero(i: int, j: int) -> int:
+        # whether s[j] extends the LCS of p[:i] and s[:j]
+        return 1 - ((rows[i] >> j) & 1)
+
+    i = len(pl)
+    j = len(sl)
+    cur = lcs(i, j)
+    up = lcs(i - 1, j) if i > 0 else 0
+    moves = bytearray()
+    while i > 0 and j > 0:
+        if pl[i - 1] == sl[j - 1]:
+            # equal last notes are always in some LCS
+            cur = up - zero(i - 1, j - 1)
+            i -= 1
+            j -= 1
+            moves.append(DIAG)
+        elif up == cur:
+            cur = up
+            i -= 1
+            moves.append(LEFT)
+        else:
+            cur -= zero(i, j - 1)
+            j -= 1
+            moves.append(DOWN)
+            up -= zero(i - 1, j)
+            continue
+        up = lcs(i - 1, j) if i > 0 else 0
+    moves.extend([LEFT] * i)
+    moves.extend([DOWN] * j)
+    return replay(moves)
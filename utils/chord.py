@@ -0,0 +1,166 @@
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from .dp import DIAG, DOWN, LEFT, IndexPair, fill, traceback
+
+# notes starting within this many ms of the first note of a group join the group
+DEFAULT_ONSET_TOLERANCE_MS = 50.0
+
+# [start, end) indices of notes sharing an onset
+Group = Tuple[int, int]
+
+
+def onset_groups(times: np.ndarray, tolerance_ms: float = 0) -> List[Group]:
+    """
+    Splits time-ordered notes into runs starting within tolerance_ms of the run's
+    first note.
+    """
+    groups: List[Group] = []
+    start = 0
+    for i in range(1, len(times)):
+        if times[i] - times[start] > tolerance_ms:
+            groups.append((start, i))
+            start = i
+    if len(times) > 0:
+        groups.append((start, len(times)))
+    return groups
+
+
+def group_counts(notes: np.ndarray, groups: List[Group]) -> np.ndarray:
+    """
+    Number of notes of each MIDI note number in each group, shape (len(groups), 128).
+    """
+    counts = np.zeros((len(groups), 128), dtype=np.int64)
+    for g, (a, b) in enumerate(groups):
+        np.add.at(counts[g], notes[a:b], 1)
+    return counts
+
+
+def fill_groups(
+    p_counts: np.ndarray, s_counts: np.ndarray, alpha: int, gamma: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    fill over onset groups instead of notes.
+
+    Two groups score alpha per note they share and gamma per note left over;
+    skipping a group costs gamma per note in it. Returns (H, D) as fill.
+    """
+    n = len(p_counts)
+    m = len(s_counts)
+    p_sizes = p_counts.sum(axis=1)
+    s_sizes = s_counts.sum(axis=1)
+    gap_p = p_sizes * gamma
+    gap_s = s_sizes * gamma
+
+    H = np.empty((n + 1, m + 1), dtype=np.int32)
+    D = np.empty((n + 1, m + 1), dtype=np.uint8)
+
+    # cumulative cost of skipping score groups
+    ramp = np.concatenate([[0], np.cumsum(gap_s)])
+    H[0] = ramp
+    D[0] = DOWN
+    D[0, 0] = 0
+
+    prev = ramp
+    h0 = 0
+    for i in range(1, n + 1):
+        pitches = np.flatnonzero(p_counts[i - 1])
+        shared = np.minimum(s_counts[:, pitches], p_counts[i - 1, pitches]).sum(axis=1)
+        sim = alpha * shared + gamma * (p_sizes[i - 1] + s_sizes - 2 * shared)
+
+        diag = prev[:-1] + sim
+        left = prev[1:] + gap_p[i - 1]
+        h0 += gap_p[i - 1]
+
+        a = np.empty(m + 1, dtype=np.int64)
+        a[0] = h0
+        np.maximum(diag, left, out=a[1:])
+        # H[i, j] = max(a[j], H[i, j - 1] + gap_s[j - 1]) resolved as a running maximum
+        row = np.maximum.accumulate(a - ramp) + ramp
+
+        D[i, 0] = LEFT
+        D[i, 1:] = (
+            (row[1:] == diag) * DIAG
+            | (row[1:] == left) * LEFT
+            | (row[1:] == row[:-1] + gap_s) * DOWN
+        )
+        H[i] = row
+        prev = row
+
+    return H, D
+
+
+def match_group(
+    p: np.ndarray,
+    p_group: Group,
+    s: np.ndarray,
+    s_group: Group,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+) -> List[IndexPair]:
+    """
+    Matches the notes of two aligned groups regardless of their order in the groups.
+
+    Equal notes are paired first; the rest are aligned by pitch, so close notes
+    become mismatches where that scores better than two gaps.
+    Performance notes are returned in order, followed by unmatched score notes.
+    """
+    pa, pb = p_group
+    sa, sb = s_group
+    match = {}
+    free_s = list(range(sa, sb))
+    for i in range(pa, pb):
+        for k, j in enumerate(free_s):
+            if s[j] == p[i]:
+                match[i] = j
+                del free_s[k]
+                break
+
+    rest_p = sorted((i for i in range(pa, pb) if i not in match), key=lambda i: p[i])
+    rest_s = sorted(free_s, key=lambda j: s[j])
+    _, D = fill(p[rest_p], s[rest_s], alpha, gamma, beta_hat)
+    for x, y in traceback(D):
+        if x >= 0 and y >= 0:
+            match[rest_p[x]] = rest_s[y]
+    matched_s = set(match.values())
+
+    path: List[IndexPair] = [(i, match.get(i, -1)) for i in range(pa, pb)]
+    path.extend((-1, j) for j in range(sa, sb) if j not in matched_s)
+    return path
+
+
+def align_groups(
+    p: np.ndarray,
+    p_times: np.ndarray,
+    s: np.ndarray,
+    s_times: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+    tolerance_ms: float = DEFAULT_ONSET_TOLERANCE_MS,
+) -> List[IndexPair]:
+    """
+    Aligns onset groups of p and s as units, then matches the notes within each
+    aligned pair of groups.
+
+    Returns note-level (P index, S index) pairs.
+    """
+    p_groups = onset_groups(p_times, tolerance_ms)
+    s_groups = onset_groups(s_times, tolerance_ms)
+    _, D = fill_groups(
+        group_counts(p, p_groups), group_counts(s, s_groups), alpha, gamma
+    )
+
+    path: List[IndexPair] = []
+    for x, y in traceback(D):
+        if x < 0:
+            a, b = s_groups[y]
+            path.extend((-1, j) for j in range(a, b))
+        elif y < 0:
+            a, b = p_groups[x]
+            path.extend((i, -1) for i in range(a, b))
+        else:
+            path.extend(
+                match_group(p, p_groups[x], s, s_groups[y], alpha, gamma, beta_hat)
+            )
+    return path
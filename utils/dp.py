@@ -0,0 +1,521 @@
+import numpy as np  # type: ignore
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# traceback direction bits--same meaning as ASMAligner's GElem flags used to have
+DIAG = 1  # match/mismatch: both P and S advance
+LEFT = 2  # gap in score: only P advances
+DOWN = 4  # gap in performance: only S advances
+
+# score of cells outside of the grid (or band)
+NEG_INF = -100000000
+
+# (index into P, index into S), -1 denotes a gap
+IndexPair = Tuple[int, int]
+
+
+def notes_array(notes) -> np.ndarray:
+    """
+    MIDI note numbers of notes as an integer array.
+    """
+    return np.array([n["midi_note_num"] for n in notes], dtype=np.int64)
+
+
+def times_array(notes) -> np.ndarray:
+    """
+    Note start times (ms) of notes as a float array.
+    """
+    return np.array([n["note_start"] for n in notes], dtype=np.float64)
+
+
+def sim_row(p: int, s: np.ndarray, alpha: int, beta_hat: int) -> np.ndarray:
+    """
+    Vectorised ASMAligner._sim between the performance note p and every note in s.
+    """
+    return np.where(s == p, alpha, np.maximum(beta_hat, -np.abs(s - p)))
+
+
+def sim_table(alpha: int, beta_hat: int) -> np.ndarray:
+    """
+    ASMAligner._sim between every pair of MIDI note numbers, indexed [p note, s note].
+    """
+    notes = np.arange(128, dtype=np.int64)
+    diff = np.abs(notes[:, None] - notes[None, :])
+    return np.where(diff == 0, alpha, np.maximum(beta_hat, -diff))
+
+
+def _next_row(
+    prev: np.ndarray,
+    i: int,
+    pi: int,
+    s: np.ndarray,
+    ramp: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes row i of the grid from row i - 1.
+
+    Returns (row, diag, left) with diag/left the candidate scores for columns 1..m.
+    """
+    m = len(s)
+    diag = prev[:-1] + sim_row(pi, s, alpha, beta_hat)
+    left = prev[1:] + gamma
+
+    # best score not ending in a gap in performance
+    a = np.empty(m + 1, dtype=np.int64)
+    a[0] = i * gamma
+    np.maximum(diag, left, out=a[1:])
+
+    # H[i, j] = max(a[j], H[i, j - 1] + gamma) resolved as a running maximum
+    row = np.maximum.accumulate(a - ramp) + ramp
+    return row, diag, left
+
+
+def fill(
+    p: np.ndarray, s: np.ndarray, alpha: int, gamma: int, beta_hat: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bottom-up Needleman-Wunsch fill.
+
+    Returns (H, D) where H[i, j] is the int32 score of aligning p[:i] with s[:j]
+    and D[i, j] the uint8 bitmask of directions achieving it.
+    """
+    n = len(p)
+    m = len(s)
+    H = np.empty((n + 1, m + 1), dtype=np.int32)
+    D = np.empty((n + 1, m + 1), dtype=np.uint8)
+
+    ramp = np.arange(m + 1, dtype=np.int64) * gamma
+    H[0] = ramp
+    D[0] = DOWN
+    D[0, 0] = 0
+
+    prev = ramp
+    for i in range(1, n + 1):
+        row, diag, left = _next_row(prev, i, p[i - 1], s, ramp, alpha, gamma, beta_hat)
+        D[i, 0] = LEFT
+        D[i, 1:] = (
+            (row[1:] == diag) * DIAG
+            | (row[1:] == left) * LEFT
+            | (row[1:] == row[:-1] + gamma) * DOWN
+        )
+        H[i] = row
+        prev = row
+
+    return H, D
+
+
+def fill_wavefront(
+    p: np.ndarray, s: np.ndarray, table: np.ndarray, gamma: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    fill, computing one anti-diagonal at a time.
+
+    Cells on an anti-diagonal only depend on the previous two, so each is a single
+    vector operation. Similarities are looked up in table (see sim_table).
+    """
+    n = len(p)
+    m = len(s)
+    H = np.empty((n + 1, m + 1), dtype=np.int32)
+    D = np.empty((n + 1, m + 1), dtype=np.uint8)
+    H[0] = np.arange(m + 1) * gamma
+    H[:, 0] = np.arange(n + 1) * gamma
+    D[0] = DOWN
+    D[:, 0] = LEFT
+    D[0, 0] = 0
+    if n == 0 or m == 0:
+        return H, D
+
+    Hf = H.reshape(-1)
+    Df = D.reshape(-1)
+    s_rev = s[::-1]
+    w = m + 1
+    for d in range(2, n + m + 1):
+        i0 = max(1, d - m)
+        i1 = min(n, d - 1)
+        # cell (i, d - i) lives at flat index i * m + d: a strided view per diagonal
+        start = i0 * m + d
+        stop = i1 * m + d + 1
+        diag = Hf[start - w - 1 : stop - w - 1 : m].astype(np.int64)
+        diag += table[p[i0 - 1 : i1], s_rev[m - d + i0 : m - d + i1 + 1]]
+        left = Hf[start - w : stop - w : m] + gamma
+        down = Hf[start - 1 : stop - 1 : m] + gamma
+        h = np.maximum(np.maximum(diag, left), down)
+        Hf[start:stop:m] = h
+        Df[start:stop:m] = (h == diag) * DIAG | (h == left) * LEFT | (h == down) * DOWN
+
+    return H, D
+
+
+def last_row(
+    p: np.ndarray, s: np.ndarray, alpha: int, gamma: int, beta_hat: int
+) -> np.ndarray:
+    """
+    Last row of the grid fill(p, s) would produce, in O(len(s)) memory.
+    """
+    ramp = np.arange(len(s) + 1, dtype=np.int64) * gamma
+    row = ramp
+    for i in range(1, len(p) + 1):
+        row, _, _ = _next_row(row, i, p[i - 1], s, ramp, alpha, gamma, beta_hat)
+    return row
+
+
+def score_only(
+    p: np.ndarray, s: np.ndarray, alpha: int, gamma: int, beta_hat: int
+) -> Tuple[int, int, int]:
+    """
+    Score of the optimal alignment, with its number of mismatches and gaps in
+    performance, keeping two rows instead of the grid.
+
+    The counts are those of traceback(fill(p, s)[1]): each cell carries the counts
+    of the path traceback would follow back from it. Returns
+    (score, mismatches, gaps in performance); gaps in score follow as
+    len(p) - len(s) + gaps in performance.
+    """
+    m = len(s)
+    cols = np.arange(m + 1, dtype=np.int64)
+    ramp = cols * gamma
+    row = ramp
+    # mismatches in the high 32 bits, gaps in performance in the low 32 bits;
+    # row 0 is all gaps in performance
+    counts = cols.copy()
+    shift = (m + 1).bit_length()
+    a = np.empty(m + 1, dtype=np.int64)
+    # similarities and mismatch increments against s, per performance note number
+    rows: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    for i in range(1, len(p) + 1):
+        pi = int(p[i - 1])
+        if pi not in rows:
+            rows[pi] = (
+                sim_row(pi, s, alpha, beta_hat),
+                (s != pi).astype(np.int64) << 32,
+            )
+        sims, mismatch = rows[pi]
+
+        diag = row[:-1] + sims
+        left = row[1:] + gamma
+        a[0] = i * gamma
+        np.maximum(diag, left, out=a[1:])
+
+        # as _next_row, with the column tagged on in the low bits so the running
+        # maximum also gives the last column not reached by a gap in performance
+        acc = np.maximum.accumulate(((a - ramp) << shift) | cols)
+        src = acc & ((1 << shift) - 1)
+        row = (acc >> shift) + ramp
+
+        # same priority as walk: diag, then left, then down
+        step = np.empty(m + 1, dtype=np.int64)
+        step[0] = 0
+        step[1:] = np.where(
+            row[1:] == diag,
+            counts[:-1] + mismatch,
+            counts[1:],
+        )
+        # a run of downs continues from that column
+        counts = step[src] + (cols - src)
+
+    return int(row[m]), int(counts[m] >> 32), int(counts[m] & 0xFFFFFFFF)
+
+
+def _crossing(
+    p: np.ndarray, s: np.ndarray, mid: int, alpha: int, gamma: int, beta_hat: int
+) -> int:
+    """
+    Column at which traceback(fill(p, s)[1]) first reaches row mid, in O(len(s)) memory.
+
+    Rows past mid carry, for every cell, the row-mid column its traceback ends up in.
+    """
+    m = len(s)
+    cols = np.arange(m + 1, dtype=np.int64)
+    ramp = cols * gamma
+    row = ramp
+    for i in range(1, mid + 1):
+        row, _, _ = _next_row(row, i, p[i - 1], s, ramp, alpha, gamma, beta_hat)
+
+    lab = cols
+    nondown = np.ones(m + 1, dtype=bool)
+    for i in range(mid + 1, len(p) + 1):
+        row, diag, left = _next_row(row, i, p[i - 1], s, ramp, alpha, gamma, beta_hat)
+        # diag/left steps take the label from the previous row...
+        base = np.empty(m + 1, dtype=np.int64)
+        base[0] = lab[0]
+        base[1:] = np.where(row[1:] == diag, lab[:-1], lab[1:])
+        # ...down steps from the closest cell to the left that did not step down
+        nondown[1:] = row[1:] == np.maximum(diag, left)
+        lab = base[np.maximum.accumulate(np.where(nondown, cols, 0))]
+    return int(lab[-1])
+
+
+def hirschberg(
+    p: np.ndarray,
+    s: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+    max_cells: int = 1 << 16,
+) -> List[IndexPair]:
+    """
+    Global alignment in memory linear in len(p) + len(s).
+
+    Finds where traceback(fill(p, s)[1]) crosses the middle row and recurses on
+    both halves, so the result is the same alignment the full grid gives.
+    Subproblems of at most max_cells cells are solved with fill/traceback.
+    """
+    path: List[IndexPair] = []
+
+    def solve(a: int, b: int, c: int, d: int):
+        if (b - a) <= 1 or (b - a + 1) * (d - c + 1) <= max_cells:
+            _, D = fill(p[a:b], s[c:d], alpha, gamma, beta_hat)
+            for x, y in traceback(D):
+                path.append((x + a if x >= 0 else -1, y + c if y >= 0 else -1))
+            return
+
+        mid = (a + b) // 2
+        k = _crossing(p[a:b], s[c:d], mid - a, alpha, gamma, beta_hat)
+        solve(a, mid, c, c + k)
+        solve(mid, b, c + k, d)
+
+    solve(0, len(p), 0, len(s))
+    return path
+
+
+def band_by_notes(n: int, m: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Band of +/- width columns around the diagonal from (0, 0) to (n, m).
+
+    Returns (lo, hi): row i of the grid covers columns lo[i]..hi[i] inclusive.
+    """
+    centre = np.arange(n + 1) * (m / n) if n > 0 else np.zeros(1)
+    lo = np.floor(centre - width).astype(np.int64)
+    hi = np.ceil(centre + width).astype(np.int64)
+    return _normalise_band(lo, hi, m)
+
+
+def band_by_ms(
+    n: int, s_times: np.ndarray, width_ms: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Band of columns within +/- width_ms of score time around the diagonal.
+
+    s_times holds the (sorted) onset times of the score notes.
+    Returns (lo, hi) as band_by_notes.
+    """
+    m = len(s_times)
+    if m == 0:
+        return _normalise_band(np.zeros(n + 1, np.int64), np.zeros(n + 1, np.int64), m)
+    # column j > 0 has consumed score note j - 1
+    col_times = np.concatenate([s_times[:1], s_times])
+    centre = np.rint(np.arange(n + 1) * (m / n) if n > 0 else np.zeros(1))
+    centre = centre.astype(np.int64)
+    centre_times = col_times[centre]
+    lo = np.searchsorted(col_times, centre_times - width_ms, side="left")
+    hi = np.searchsorted(col_times, centre_times + width_ms, side="right") - 1
+    return _normalise_band(np.minimum(lo, centre), np.maximum(hi, centre), m)
+
+
+def _normalise_band(
+    lo: np.ndarray, hi: np.ndarray, m: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Clips a band to the grid and makes every cell in it reachable from (0, 0).
+    """
+    lo = np.clip(lo, 0, m)
+    hi = np.clip(hi, 0, m)
+    lo[0] = 0
+    hi[-1] = m
+    hi = np.maximum.accumulate(hi)
+    lo = np.minimum.accumulate(lo[::-1])[::-1].copy()
+    # the first cell of each row needs a predecessor in the previous row
+    lo[1:] = np.minimum(lo[1:], hi[:-1] + 1)
+    return lo, hi
+
+
+def fill_banded(
+    p: np.ndarray,
+    s: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    fill restricted to columns lo[i]..hi[i] of each row i.
+
+    Returns (H, D) with cell (i, j) stored at [i, j - lo[i]]. Cells outside the band
+    score NEG_INF.
+    """
+    return fill_corridor(
+        lo,
+        hi,
+        lambda i, j0, j1: sim_row(p[i - 1], s[j0 - 1 : j1], alpha, beta_hat),
+        np.full(len(p), gamma, dtype=np.int64),
+        np.full(len(s), gamma, dtype=np.int64),
+    )
+
+
+def fill_corridor(
+    lo: np.ndarray,
+    hi: np.ndarray,
+    sim: Callable[[int, int, int], np.ndarray],
+    gap_p: np.ndarray,
+    gap_s: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Banded fill over arbitrary units.
+
+    sim(i, j0, j1) gives the similarity of P unit i - 1 with S units j0 - 1..j1 - 1;
+    gap_p/gap_s the cost of skipping each unit of P/S.
+    Returns (H, D) as fill_banded.
+    """
+    n = len(gap_p)
+    width = int(np.max(hi - lo)) + 1
+    H = np.full((n + 1, width), NEG_INF, dtype=np.int32)
+    D = np.zeros((n + 1, width), dtype=np.uint8)
+
+    # cost of skipping the first i units of P / j units of S
+    gap_p_cum = np.concatenate([[0], np.cumsum(gap_p)]).astype(np.int64)
+    gap_s_cum = np.concatenate([[0], np.cumsum(gap_s)]).astype(np.int64)
+
+    prev = gap_s_cum[: hi[0] + 1]
+    H[0, : len(prev)] = prev
+    D[0, 1 : len(prev)] = DOWN
+
+    for i in range(1, n + 1):
+        l = int(lo[i])
+        h = int(hi[i])
+        pl = int(lo[i - 1])
+        ph = int(hi[i - 1])
+        ramp = gap_s_cum[l : h + 1]
+
+        # previous row over columns l - 1..h
+        pv = np.full(h - l + 2, NEG_INF, dtype=np.int64)
+        a0 = max(pl, l - 1)
+        a1 = min(ph, h)
+        if a0 <= a1:
+            pv[a0 - l + 1 : a1 - l + 2] = prev[a0 - pl : a1 - pl + 1]
+
+        # column 0 can only be reached by gaps in score
+        off = 1 if l == 0 else 0
+        diag = pv[:-1].copy()
+        if l + off <= h:
+            diag[off:] += sim(i, l + off, h)
+        left = pv[1:] + gap_p[i - 1]
+        if l == 0:
+            diag[0] = NEG_INF
+            left[0] = gap_p_cum[i]
+        a = np.maximum(diag, left)
+
+        row = np.maximum.accumulate(a - ramp) + ramp
+
+        dirs = (row == diag) * DIAG | (row == left) * LEFT
+        dirs[1:] |= (row[1:] == row[:-1] + gap_s[l:h]) * DOWN
+        H[i, : h - l + 1] = row
+        D[i, : h - l + 1] = dirs
+        prev = row
+
+    return H, D
+
+
+def touches_band_edge(
+    path: List[IndexPair], lo: np.ndarray, hi: np.ndarray, m: int
+) -> bool:
+    """
+    Whether path runs along an edge of the band that is not the edge of the grid.
+    """
+    i = 0
+    j = 0
+    for x, y in path:
+        if x >= 0:
+            i += 1
+        if y >= 0:
+            j += 1
+        if (j == lo[i] and j > 0) or (j == hi[i] and j < m):
+            return True
+    return False
+
+
+def path_score(
+    path: Iterable[IndexPair],
+    p: np.ndarray,
+    s: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+) -> int:
+    """
+    Score of an alignment path under the ASMAligner scoring.
+    """
+    score = 0
+    for x, y in path:
+        if x >= 0 and y >= 0:
+            pn = int(p[x])
+            sn = int(s[y])
+            score += alpha if pn == sn else max(beta_hat, -abs(pn - sn))
+        else:
+            score += gamma
+    return score
+
+
+def traceback(D: np.ndarray) -> List[IndexPair]:
+    """
+    Walks D back from the bottom-right corner, preferring diag, then left, then down.
+    """
+    return list(iter_traceback(D))
+
+
+def iter_traceback(D: np.ndarray) -> Iterator[IndexPair]:
+    """
+    traceback as a generator.
+
+    D is walked once, recording one byte per step, and the path is then yielded
+    from the top-left corner.
+    """
+    yield from replay(walk(D.shape[0] - 1, D.shape[1] - 1, D.item))
+
+
+def traceback_banded(D: np.ndarray, lo: np.ndarray, m: int) -> List[IndexPair]:
+    """
+    traceback over the (H, D) fill_banded gives.
+    """
+    return list(replay(walk(D.shape[0] - 1, m, lambda i, j: D.item(i, j - lo[i]))))
+
+
+def walk(i: int, j: int, dir_at: Callable[[int, int], int]) -> bytearray:
+    """
+    Steps (DIAG, LEFT or DOWN) taken from cell (i, j) back to (0, 0).
+    """
+    moves = bytearray()
+    while i > 0 or j > 0:
+        d = dir_at(i, j)
+        if d & DIAG:
+            i -= 1
+            j -= 1
+            moves.append(DIAG)
+        elif d & LEFT:
+            i -= 1
+            moves.append(LEFT)
+        else:
+            j -= 1
+            moves.append(DOWN)
+    return moves
+
+
+def replay(moves: bytearray) -> Iterator[IndexPair]:
+    """
+    Yields the path walk recorded, from (0, 0) onwards.
+    """
+    i = 0
+    j = 0
+    for d in reversed(moves):
+        if d == DIAG:
+            yield (i, j)
+            i += 1
+            j += 1
+        elif d == LEFT:
+            yield (i, -1)
+            i += 1
+        else:
+            yield (-1, j)
+            j += 1
@@ -0,0 +1,140 @@
+import numpy as np  # type: ignore
+from typing import Dict, List, Tuple
+from .dp import DIAG, DOWN, LEFT, IndexPair, replay, sim_row
+
+# length of the exact pitch k-grams used as seeds
+DEFAULT_SEED = 4
+
+# score regions, by number of seeds hitting them, searched by align_local
+DEFAULT_CANDIDATES = 3
+
+
+def fill_local(
+    p: np.ndarray, s: np.ndarray, alpha: int, gamma: int, beta_hat: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Smith-Waterman fill: as fill, but no cell scores below 0, so an alignment can
+    start and end anywhere.
+
+    Returns (H, D) as fill, with D 0 where an alignment starts.
+    """
+    n = len(p)
+    m = len(s)
+    H = np.zeros((n + 1, m + 1), dtype=np.int32)
+    D = np.zeros((n + 1, m + 1), dtype=np.uint8)
+
+    ramp = np.arange(m + 1, dtype=np.int64) * gamma
+    prev = np.zeros(m + 1, dtype=np.int64)
+    a = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        diag = prev[:-1] + sim_row(p[i - 1], s, alpha, beta_hat)
+        left = prev[1:] + gamma
+        # best score not ending in a gap in performance, or a fresh start
+        np.maximum(np.maximum(diag, left), 0, out=a[1:])
+        row = np.maximum.accumulate(a - ramp) + ramp
+
+        D[i, 1:] = (
+            (row[1:] == diag) * DIAG
+            | (row[1:] == left) * LEFT
+            | (row[1:] == row[:-1] + gamma) * DOWN
+        ) * (row[1:] > 0)
+        H[i] = row
+        prev = row
+
+    return H, D
+
+
+def traceback_local(H: np.ndarray, D: np.ndarray) -> List[IndexPair]:
+    """
+    Walks D back from the best cell of H (the first, row by row, on ties) to where
+    its alignment starts, preferring diag, then left, then down.
+    """
+    i, j = (int(x) for x in np.unravel_index(np.argmax(H), H.shape))
+    moves = bytearray()
+    while True:
+        d = D.item(i, j)
+        if d & DIAG:
+            i -= 1
+            j -= 1
+            moves.append(DIAG)
+        elif d & LEFT:
+            i -= 1
+            moves.append(LEFT)
+        elif d & DOWN:
+            j -= 1
+            moves.append(DOWN)
+        else:
+            break
+    return [
+        (x + i if x >= 0 else -1, y + j if y >= 0 else -1) for x, y in replay(moves)
+    ]
+
+
+def seed_windows(
+    p: np.ndarray, s: np.ndarray, k: int, candidates: int
+) -> List[Tuple[int, int]]:
+    """
+    Ranges of s worth aligning p against locally.
+
+    Every k-gram of p occurring in s votes for the offset between the two; the
+    candidates offsets with the most votes nearby give ranges as long as p plus
+    len(p) either side. Overlapping ranges are merged. Returns (start, end) pairs,
+    or the whole of s if p and s share no k-gram.
+    """
+    n = len(p)
+    m = len(s)
+    pb = p.astype(np.uint8).tobytes()
+    sb = s.astype(np.uint8).tobytes()
+    index: Dict[bytes, List[int]] = {}
+    for j in range(m - k + 1):
+        index.setdefault(sb[j : j + k], []).append(j)
+    offsets = [j - i for i in range(n - k + 1) for j in index.get(pb[i : i + k], [])]
+    if len(offsets) == 0:
+        return [(0, m)]
+
+    # votes within a quarter of the excerpt's length count together
+    width = max(1, n // 4)
+    bins = (np.array(offsets) + n) // width
+    votes = np.bincount(bins)
+    best = np.argsort(-votes, kind="stable")[:candidates]
+    windows = []
+    for bi in best:
+        if votes[bi] > 0:
+            # offsets in bin bi are [start, start + width)
+            start = int(bi) * width - n
+            windows.append((max(0, start - n), min(m, start + width + n + n)))
+    windows.sort()
+
+    merged: List[Tuple[int, int]] = []
+    for a, b in windows:
+        if len(merged) > 0 and a <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+
+def align_local(
+    p: np.ndarray,
+    s: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+    k: int = DEFAULT_SEED,
+    candidates: int = DEFAULT_CANDIDATES,
+) -> List[IndexPair]:
+    """
+    Best-scoring local alignment of p against s, only searching the parts of s
+    seed_windows picks.
+
+    Returns the (P index, S index) pairs of the aligned region only.
+    """
+    best_score = 0
+    best: List[IndexPair] = []
+    for a, b in seed_windows(p, s, k, candidates):
+        H, D = fill_local(p, s[a:b], alpha, gamma, beta_hat)
+        score = int(H.max())
+        if score > best_score:
+            best_score = score
+            best = [(x, y + a if y >= 0 else -1) for x, y in traceback_local(H, D)]
+    return best
@@ -0,0 +1,169 @@
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from .chord import DEFAULT_ONSET_TOLERANCE_MS, Group, group_counts, onset_groups
+from .dp import (
+    IndexPair,
+    _normalise_band,
+    fill_banded,
+    fill_corridor,
+    traceback_banded,
+)
+
+# corridor half-width, in units of the finer level, around a projected path
+DEFAULT_RADIUS = 8
+
+# stop coarsening once both sides have at most this many units
+MIN_UNITS = 64
+
+
+def align_multires(
+    p: np.ndarray,
+    p_times: np.ndarray,
+    s: np.ndarray,
+    s_times: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+    radius: int = DEFAULT_RADIUS,
+    tolerance_ms: float = DEFAULT_ONSET_TOLERANCE_MS,
+) -> List[IndexPair]:
+    """
+    Coarse-to-fine alignment, as FastDTW.
+
+    Notes are grouped into onset groups, then pairs of neighbouring groups, and so
+    on. The coarsest level is aligned in full by pitch-set similarity; each finer
+    level is only aligned within radius units of the path projected from the level
+    above, down to the notes. Near-linear time, but not guaranteed optimal.
+    """
+    p_levels = _levels(p_times, tolerance_ms)
+    s_levels = _levels(s_times, tolerance_ms)
+    depth = min(len(p_levels), len(s_levels))
+    p_levels = p_levels[:depth]
+    s_levels = s_levels[:depth]
+
+    # coarsest level: whole grid
+    lo = np.zeros(len(p_levels[-1]) + 1, dtype=np.int64)
+    hi = np.full(len(p_levels[-1]) + 1, len(s_levels[-1]), dtype=np.int64)
+    path = _align_groups_corridor(
+        p, p_levels[-1], s, s_levels[-1], lo, hi, alpha, gamma
+    )
+
+    for level in range(depth - 2, -1, -1):
+        lo, hi = _project(
+            path,
+            p_levels[level + 1],
+            p_levels[level],
+            s_levels[level + 1],
+            s_levels[level],
+            radius,
+        )
+        path = _align_groups_corridor(
+            p, p_levels[level], s, s_levels[level], lo, hi, alpha, gamma
+        )
+
+    # notes
+    p_units = p_levels[0] if depth > 0 else []
+    s_units = s_levels[0] if depth > 0 else []
+    lo, hi = _project(
+        path, p_units, _singletons(len(p)), s_units, _singletons(len(s)), radius
+    )
+    _, D = fill_banded(p, s, lo, hi, alpha, gamma, beta_hat)
+    return traceback_banded(D, lo, len(s))
+
+
+def _singletons(n: int) -> List[Group]:
+    return [(i, i + 1) for i in range(n)]
+
+
+def _levels(times: np.ndarray, tolerance_ms: float) -> List[List[Group]]:
+    """
+    Onset groups, then successive merges of neighbouring pairs, as note index ranges.
+    """
+    levels = [onset_groups(times, tolerance_ms)]
+    while len(levels[-1]) > MIN_UNITS:
+        prev = levels[-1]
+        levels.append(
+            [
+                (prev[k][0], prev[min(k + 1, len(prev) - 1)][1])
+                for k in range(0, len(prev), 2)
+            ]
+        )
+    return levels
+
+
+def _align_groups_corridor(
+    p: np.ndarray,
+    p_units: List[Group],
+    s: np.ndarray,
+    s_units: List[Group],
+    lo: np.ndarray,
+    hi: np.ndarray,
+    alpha: int,
+    gamma: int,
+) -> List[IndexPair]:
+    """
+    Aligns units by pitch-set similarity (see fill_groups) within a corridor.
+    """
+    p_counts = group_counts(p, p_units)
+    s_counts = group_counts(s, s_units)
+    p_sizes = p_counts.sum(axis=1)
+    s_sizes = s_counts.sum(axis=1)
+
+    def sim(i: int, j0: int, j1: int) -> np.ndarray:
+        pitches = np.flatnonzero(p_counts[i - 1])
+        shared = np.minimum(
+            s_counts[j0 - 1 : j1, pitches], p_counts[i - 1, pitches]
+        ).sum(axis=1)
+        return alpha * shared + gamma * (
+            p_sizes[i - 1] + s_sizes[j0 - 1 : j1] - 2 * shared
+        )
+
+    _, D = fill_corridor(lo, hi, sim, p_sizes * gamma, s_sizes * gamma)
+    return traceback_banded(D, lo, len(s_units))
+
+
+def _project(
+    path: List[IndexPair],
+    p_coarse: List[Group],
+    p_fine: List[Group],
+    s_coarse: List[Group],
+    s_fine: List[Group],
+    radius: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Corridor over the finer grid covering the cells of path, widened by radius.
+
+    Returns (lo, hi) as band_by_notes.
+    """
+    n = len(p_fine)
+    m = len(s_fine)
+    # grid line of the finer level each coarse grid line falls on
+    p_lines = _grid_lines(p_coarse, p_fine)
+    s_lines = _grid_lines(s_coarse, s_fine)
+
+    lo = np.full(n + 1, m, dtype=np.int64)
+    hi = np.zeros(n + 1, dtype=np.int64)
+    i = 0
+    j = 0
+    for x, y in path:
+        ni = i + (x >= 0)
+        nj = j + (y >= 0)
+        r0 = p_lines[i]
+        r1 = p_lines[ni]
+        lo[r0 : r1 + 1] = np.minimum(lo[r0 : r1 + 1], s_lines[j])
+        hi[r0 : r1 + 1] = np.maximum(hi[r0 : r1 + 1], s_lines[nj])
+        i = ni
+        j = nj
+
+    for _ in range(radius):
+        lo[1:] = np.minimum(lo[1:], lo[:-1])
+        hi[:-1] = np.maximum(hi[:-1], hi[1:])
+    return _normalise_band(lo - radius, hi + radius, m)
+
+
+def _grid_lines(coarse: List[Group], fine: List[Group]) -> np.ndarray:
+    starts = [a for a, _ in fine]
+    total = fine[-1][1] if len(fine) > 0 else 0
+    lines = np.searchsorted(starts, [a for a, _ in coarse] + [total])
+    lines[-1] = len(fine)
+    return lines
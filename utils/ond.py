@@ -0,0 +1,90 @@
+import numpy as np  # type: ignore
+from typing import List, Optional, Tuple
+from .dp import (
+    IndexPair,
+    _normalise_band,
+    fill_banded,
+    traceback_banded,
+)
+
+# differences tolerated before falling back to the full grid, as a fraction of
+# the total number of notes
+DEFAULT_MAX_DIFF_RATIO = 0.05
+
+
+def diff_count(p: np.ndarray, s: np.ndarray, max_d: int) -> Optional[int]:
+    """
+    Myers' O(ND) greedy diff: the fewest notes to delete from p and s combined to
+    make them equal, or None if that is more than max_d.
+    """
+    pl = p.tolist()
+    sl = s.tolist()
+    n = len(pl)
+    m = len(sl)
+    # furthest index into p reached on each diagonal k = i - j, offset by max_d + 1
+    off = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[off + k - 1] < v[off + k + 1]):
+                # step from diagonal k + 1: skip a score note
+                i = v[off + k + 1]
+            else:
+                # step from diagonal k - 1: skip a performance note
+                i = v[off + k - 1] + 1
+            j = i - k
+            while i < n and j < m and pl[i] == sl[j]:
+                i += 1
+                j += 1
+            v[off + k] = i
+            if i >= n and j >= m:
+                return d
+    return None
+
+
+def diff_band(n: int, m: int, max_gaps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ukkonen's band: the cells some alignment with at most max_gaps gaps passes
+    through.
+
+    Reaching (i, j) takes at least |j - i| gaps, and going on to (n, m) at least
+    |(m - n) - (j - i)| more. Returns (lo, hi) as band_by_notes.
+    """
+    c = m - n
+    extra = (max_gaps - abs(c)) // 2
+    rows = np.arange(n + 1, dtype=np.int64)
+    lo = rows + min(0, c) - extra
+    hi = rows + max(0, c) + extra
+    return _normalise_band(lo, hi, m)
+
+
+def align_ond(
+    p: np.ndarray,
+    s: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+    max_d: int,
+) -> Optional[List[IndexPair]]:
+    """
+    traceback(fill(p, s)[1]) in O((len(p) + len(s)) * D) time, for p and s that
+    differ by D <= max_d notes (see diff_count); None if they differ by more.
+
+    Pairing the D-free common subsequence and leaving the rest as gaps gives a
+    lower bound on the optimal score, which caps how many gaps, and so how far
+    from the diagonal, an optimal alignment can go. Every optimal alignment lies in
+    that band, so the banded fill traces back the same one as the full grid.
+    Needs alpha to be the highest similarity and gamma < alpha / 2.
+    """
+    n = len(p)
+    m = len(s)
+    d = diff_count(p, s, max_d)
+    if d is None:
+        return None
+    common = (n + m - d) // 2
+    lower = alpha * common + gamma * d
+    # an alignment with g gaps scores at most alpha * (n + m - g) / 2 + gamma * g
+    max_gaps = (alpha * (n + m) - 2 * lower) // (alpha - 2 * gamma)
+    lo, hi = diff_band(n, m, max_gaps)
+    _, D = fill_banded(p, s, lo, hi, alpha, gamma, beta_hat)
+    return traceback_banded(D, lo, m)
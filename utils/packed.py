@@ -0,0 +1,87 @@
+import tempfile
+import numpy as np  # type: ignore
+from typing import List, Optional, Tuple
+from .dp import DIAG, DOWN, LEFT, IndexPair, _next_row, replay, walk
+
+# direction codes stored per cell, the 2-bit index into _DIRS
+_DIRS = [0, DIAG, LEFT, DOWN]
+
+# cells per byte
+_CELLS = 4
+
+
+def fill_packed(
+    p: np.ndarray,
+    s: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+    D: np.ndarray,
+):
+    """
+    fill, keeping only the previous row of scores and writing the direction walk
+    takes from each cell (diag before left before down) into D at 2 bits a cell.
+
+    Cell (i, j) is bits 2 * (j % 4) up of byte D[i, j // 4]; D must have
+    packed_shape(len(p), len(s)) and may be a np.memmap larger than memory.
+    """
+    m = len(s)
+    codes = np.zeros(D.shape[1] * _CELLS, dtype=np.uint8)
+
+    ramp = np.arange(m + 1, dtype=np.int64) * gamma
+    codes[1 : m + 1] = 3
+    D[0] = _pack(codes)
+
+    prev = ramp
+    codes[0] = 2
+    for i in range(1, len(p) + 1):
+        row, diag, left = _next_row(prev, i, p[i - 1], s, ramp, alpha, gamma, beta_hat)
+        r = row[1:]
+        codes[1 : m + 1] = np.where(r == diag, 1, np.where(r == left, 2, 3))
+        D[i] = _pack(codes)
+        prev = row
+
+
+def traceback_packed(D: np.ndarray, m: int) -> List[IndexPair]:
+    """
+    traceback over the D fill_packed writes, reading it from the last row up.
+    """
+    n = D.shape[0] - 1
+    return list(
+        replay(
+            walk(n, m, lambda i, j: _DIRS[(D.item(i, j >> 2) >> ((j & 3) << 1)) & 3])
+        )
+    )
+
+
+def packed_shape(n: int, m: int) -> Tuple[int, int]:
+    """
+    Shape of the D fill_packed takes for len(p) == n and len(s) == m.
+    """
+    return (n + 1, (m + _CELLS) // _CELLS)
+
+
+def align_packed(
+    p: np.ndarray,
+    s: np.ndarray,
+    alpha: int,
+    gamma: int,
+    beta_hat: int,
+    tmp_dir: Optional[str] = None,
+) -> List[IndexPair]:
+    """
+    The dense alignment, with its directions in a temporary file memory-mapped
+    under tmp_dir (defaults to the system's) instead of in memory, so the grid
+    may be larger than memory: a 50k x 50k grid takes 625MB of disk.
+    """
+    with tempfile.TemporaryFile(dir=tmp_dir) as f:
+        D = np.memmap(f, dtype=np.uint8, mode="w+", shape=packed_shape(len(p), len(s)))
+        fill_packed(p, s, alpha, gamma, beta_hat, D)
+        path = traceback_packed(D, len(s))
+        del D
+    return path
+
+
+def _pack(codes: np.ndarray) -> np.ndarray:
+    c = codes.reshape(-1, _CELLS)
+    return c[:, 0] | (c[:, 1] << 2) | (c[:, 2] << 4) | (c[:, 3] << 6)
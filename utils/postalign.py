@@ -1,171 +1,432 @@
-from .sharedtypes import Alignment, NoteInfo
-from typing import Optional, List, Tuple
-from copy import deepcopy
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .dp import IndexPair
+from .sharedtypes import Alignment, AlignmentElem, NoteInfo
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sortedcontainers import SortedList  # type: ignore
+
+# Because score times are perturbed, don't instantly break when the first score time is
+# over the threshold. Look forward a certain number of elements (counting the current).
+DEFAULT_LOOKFORWARD_LIMIT = 100
+
+# (path, P, S, threshold_ms, lookforward_limit, two_pass, context) of a segment
+SegmentJob = Tuple[
+    List[IndexPair],
+    List[NoteInfo],
+    List[NoteInfo],
+    float,
+    int,
+    bool,
+    Tuple[Optional[float], Optional[float]],
+]
 
 
 class PostAlign:
-    def __init__(self, alignment: Alignment, threshold_ms: float):
-        self.alignment = deepcopy(alignment)
+    """
+    Swaps and merges score notes between nearby mismatches and gaps so that more
+    notes match, walking the alignment backwards, then forwards if two_pass.
+
+    The alignment is held as columns of indices into the performance and score
+    notes, which are never copied; the Alignment is only built on output.
+    Elements are never moved: a merged-away element is left as a tombstone, and
+    indexes from pitch to the elements a note of that pitch could be repaired with
+    find each candidate in logarithmic time.
+
+    With workers other than 1, the alignment is cut where no repair can cross (see
+    _segments) and the pieces are repaired in a process pool, with the same result.
+    """
+
+    def __init__(
+        self,
+        alignment: Iterable[AlignmentElem],
+        threshold_ms: float,
+        lookforward_limit: int = DEFAULT_LOOKFORWARD_LIMIT,
+        workers: Optional[int] = 1,
+    ):
+        P: List[NoteInfo] = []
+        S: List[NoteInfo] = []
+        path: List[IndexPair] = []
+        for el in alignment:
+            p = el["p"]
+            s = el["s"]
+            path.append(
+                (len(P) if p is not None else -1, len(S) if s is not None else -1)
+            )
+            if p is not None:
+                P.append(p)
+            if s is not None:
+                S.append(s)
+        self._init(path, P, S, threshold_ms, lookforward_limit, workers)
+
+    @classmethod
+    def from_path(
+        cls,
+        path: Iterable[IndexPair],
+        P: List[NoteInfo],
+        S: List[NoteInfo],
+        threshold_ms: float,
+        lookforward_limit: int = DEFAULT_LOOKFORWARD_LIMIT,
+        workers: Optional[int] = 1,
+    ) -> "PostAlign":
+        """
+        PostAlign over the alignment of P and S given as (P index, S index) pairs.
+        """
+        pa = cls.__new__(cls)
+        pa._init(path, P, S, threshold_ms, lookforward_limit, workers)
+        return pa
+
+    def _init(
+        self,
+        path: Iterable[IndexPair],
+        P: List[NoteInfo],
+        S: List[NoteInfo],
+        threshold_ms: float,
+        lookforward_limit: int,
+        workers: Optional[int],
+    ):
+        if lookforward_limit < 1:
+            raise ValueError(
+                f"Lookforward limit must be at least 1, got {lookforward_limit}"
+            )
+        self.P = P
+        self.S = S
         self.threshold_ms = threshold_ms
+        # elements, from the current one on, searched for a note to repair with
+        self.lookforward_limit = lookforward_limit
         self.two_pass = True
+        # processes repairing segments at once, defaults to the number of CPUs
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        # score times of the closest score notes before and after the alignment, in
+        # walking order, when it is a segment of a larger one
+        self._context: Tuple[Optional[float], Optional[float]] = (None, None)
+        # largest score time distance a candidate was let through at, and smallest
+        # one a candidate was turned away at: any threshold in between repairs the
+        # same
+        self._max_accepted = 0.0
+        self._min_rejected = float("inf")
+        # P and S index of each element, -1 for a gap
+        self._pi: List[int] = []
+        self._si: List[int] = []
+        for x, y in path:
+            self._pi.append(x)
+            self._si.append(y)
+        self._p_pitch = [n["midi_note_num"] for n in P]
+        self._s_pitch = [n["midi_note_num"] for n in S]
+        self._s_time = [n["note_start"] for n in S]
 
     def postalign(self) -> Alignment:
+        return [
+            {"p": self.P[x] if x >= 0 else None, "s": self.S[y] if y >= 0 else None}
+            for x, y in self.postalign_path()
+        ]
+
+    def postalign_path(self) -> List[IndexPair]:
+        """
+        postalign as (P index, S index) pairs.
+        """
+        bounds = self._segments() if self.workers > 1 else []
+        # group the segments into a few jobs of similar length
+        n = len(self._pi)
+        target = n // (4 * self.workers)
+        cuts = [0]
+        gaps = [0.0]
+        for b, gap in bounds:
+            if b - cuts[-1] >= target:
+                cuts.append(b)
+                gaps.append(gap)
+        if n - cuts[-1] < target and len(cuts) > 1:
+            cuts.pop()
+            gaps.pop()
+        cuts.append(n)
+
+        if len(cuts) == 2:
+            return self._postalign_path()
+        # the pieces never compare score times across a cut
+        self._min_rejected = min(gaps[1:])
+
+        jobs = [self._segment_job(a, b) for a, b in zip(cuts, cuts[1:])]
+        path: List[IndexPair] = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            solved = executor.map(_postalign_segment, [job for job, _, _ in jobs])
+            # back to P and S indices, in order
+            for (_, xs, ys), (res, max_accepted, min_rejected) in zip(jobs, solved):
+                self._max_accepted = max(self._max_accepted, max_accepted)
+                self._min_rejected = min(self._min_rejected, min_rejected)
+                path.extend(
+                    (xs[x] if x >= 0 else -1, ys[y] if y >= 0 else -1) for x, y in res
+                )
+        return path
+
+    def sweep(self, thresholds: List[float]) -> List[Alignment]:
+        """
+        postalign for each of thresholds in place of threshold_ms, in order, without
+        changing this PostAlign. A negative threshold leaves the alignment as it is.
+
+        The thresholds are run smallest first, and a run's result is reused for
+        every larger threshold that no candidate score time distance the run
+        compared fell between.
+        """
+        base = list(zip(self._pi, self._si))
+        results: Dict[float, List[IndexPair]] = {}
+        # [lowest, highest) thresholds the last run's result holds for
+        valid = (1.0, 0.0)
+        last: List[IndexPair] = []
+        for t in sorted(set(thresholds)):
+            if t < 0:
+                results[t] = base
+                continue
+            if not valid[0] <= t < valid[1]:
+                pa = PostAlign.from_path(
+                    base, self.P, self.S, t, self.lookforward_limit, self.workers
+                )
+                pa.two_pass = self.two_pass
+                last = pa.postalign_path()
+                valid = (pa._max_accepted, pa._min_rejected)
+            results[t] = last
+        return [
+            [
+                {"p": self.P[x] if x >= 0 else None, "s": self.S[y] if y >= 0 else None}
+                for x, y in results[t]
+            ]
+            for t in thresholds
+        ]
+
+    def _postalign_path(self) -> List[IndexPair]:
         self._postalign_backward()
         if self.two_pass:
             # reverse
-            self.alignment.reverse()
+            self._pi.reverse()
+            self._si.reverse()
+            self._context = (self._context[1], self._context[0])
             # run again
             self._postalign_backward()
-            self.alignment.reverse()
-        return self.alignment
+            self._pi.reverse()
+            self._si.reverse()
+            self._context = (self._context[1], self._context[0])
+        return list(zip(self._pi, self._si))
 
-    def _postalign_backward(self):
-        # walk backwards so the closest errors are fixed first
-        for i in range(len(self.alignment) - 1, -1, -1):
-            el_p = self.alignment[i]["p"]
-            el_s = self.alignment[i]["s"]
+    def _segments(self) -> List[Tuple[int, float]]:
+        """
+        Positions the alignment can be cut at and each piece repaired on its own,
+        with the least score time distance across each.
+
+        A repair pairs a note with one within threshold_ms of score time of the
+        closest score note, which is the element's own piece's or, for elements at
+        the ends of a piece, the neighbouring piece's. So with every score time
+        before a cut more than threshold_ms below every score time after it, and a
+        score note in every piece, no repair crosses a cut, and a piece repaired
+        alone only needs the score times of the closest score notes either side.
+        """
+        n = len(self._si)
+        inf = float("inf")
+        suffix_min = [inf] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            y = self._si[i]
+            t = self._s_time[y] if y >= 0 else inf
+            suffix_min[i] = min(suffix_min[i + 1], t)
 
-            next_indices = self._get_threshold_range(i)
+        bounds: List[Tuple[int, float]] = []
+        prefix_max = -inf
+        # whether the piece since the last cut has a score note
+        has_s = False
+        for b in range(1, n):
+            y = self._si[b - 1]
+            if y >= 0:
+                prefix_max = max(prefix_max, self._s_time[y])
+                has_s = True
+            # suffix_min is inf if nothing after b has a score note
+            if has_s and prefix_max + self.threshold_ms < suffix_min[b] < inf:
+                bounds.append((b, suffix_min[b] - prefix_max))
+                has_s = False
+        return bounds
 
-            if el_p is not None:
+    def _segment_job(self, a: int, b: int) -> Tuple[SegmentJob, List[int], List[int]]:
+        """
+        Arguments of _postalign_segment for elements a to b, with its notes
+        renumbered, and the P and S indices of those notes.
+        """
+        xs = [x for x in self._pi[a:b] if x >= 0]
+        ys = [y for y in self._si[a:b] if y >= 0]
+        local_x = {x: k for k, x in enumerate(xs)}
+        local_y = {y: k for k, y in enumerate(ys)}
+        path = [
+            (local_x[x] if x >= 0 else -1, local_y[y] if y >= 0 else -1)
+            for x, y in zip(self._pi[a:b], self._si[a:b])
+        ]
+        before = next((self._s_time[y] for y in reversed(self._si[:a]) if y >= 0), None)
+        after = next((self._s_time[y] for y in self._si[b:] if y >= 0), None)
+        job: SegmentJob = (
+            path,
+            [self.P[x] for x in xs],
+            [self.S[y] for y in ys],
+            self.threshold_ms,
+            self.lookforward_limit,
+            self.two_pass,
+            (before, after),
+        )
+        return job, xs, ys
+
+    def _postalign_backward(self):
+        self._build_index()
+        # walk backwards so the closest errors are fixed first; elements are only
+        # ever deleted ahead of i
+        for i in range(len(self._pi) - 1, -1, -1):
+            x = self._pi[i]
+            y = self._si[i]
+
+            if x >= 0:
                 # el_p OK
-                if el_s is not None and el_s["midi_note_num"] != el_p["midi_note_num"]:
+                if y >= 0 and self._s_pitch[y] != self._p_pitch[x]:
                     # mismatch
-                    self._fix_mismatch(el_p, el_s, i)
-                elif el_s is None:
+                    self._fix_mismatch(x, i)
+                elif y < 0:
                     # score gap
-                    self._fix_gap_el_p(el_p, i)
-            elif el_s is not None:
+                    self._fix_gap_el_p(x, i)
+            elif y >= 0:
                 # gap in el_p
-                self._fix_gap_el_s(el_s, i)
+                self._fix_gap_el_s(y, i)
 
-    def _fix_gap_el_s(
-        self,
-        el_s: NoteInfo,
-        i: int,
-    ):
+        # drop the tombstones
+        self._pi = [self._pi[i] for i in self._live]
+        self._si = [self._si[i] for i in self._live]
+
+    def _fix_gap_el_s(self, y: int, i: int):
         """
-        el_s has a gap perf note. Try to fix it.
-        """
-        next_indices = self._get_threshold_range(i)
-        for j in next_indices:
-            cand_el = self.alignment[j]
-            cand_el_p = cand_el["p"]
-            cand_el_s = cand_el["s"]
-            if cand_el_p is not None and cand_el_s is not None:
-                if cand_el_s["midi_note_num"] != cand_el_p["midi_note_num"]:
-                    # mismatch--check if cand_el_p matches ours
-                    if cand_el_p["midi_note_num"] == el_s["midi_note_num"]:
-                        # match, now we need to swap them
-                        self._swap_score_note(i, j)
-                        return
-            elif cand_el_p is not None:
-                # cand_el["s"] is a gap
-                # check if the note matches
-                if cand_el_p["midi_note_num"] == el_s["midi_note_num"]:
-                    # match, now we need to merge them
-                    self.alignment[j]["s"] = deepcopy(el_s)
-                    del self.alignment[i : i + 1]
-                    return
-
-    def _fix_gap_el_p(
-        self,
-        el_p: NoteInfo,
-        i: int,
-    ):
+        Score note S[y] has a gap perf note. Try to fix it.
         """
-        el_p has a gap score note. Try to fix it.
-        """
-        next_indices = self._get_threshold_range(i)
-        for j in next_indices:
-            cand_el = self.alignment[j]
-            cand_el_p = cand_el["p"]
-            cand_el_s = cand_el["s"]
-            if cand_el_s is not None:
-                if cand_el_p is not None:
-                    if cand_el_s["midi_note_num"] != cand_el_p["midi_note_num"]:
-                        # mismatch--check if cand_el_s matches ours
-                        if cand_el_s["midi_note_num"] == el_p["midi_note_num"]:
-                            self._swap_score_note(i, j)
-                            return
-                else:
-                    # cand_el["p"] is a gap
-                    # check if the note matches
-                    if cand_el_s["midi_note_num"] == el_p["midi_note_num"]:
-                        # match, now we need to merge them
-                        self.alignment[i]["s"] = deepcopy(cand_el_s)
-                        del self.alignment[j : j + 1]
-                        return
-
-    def _fix_mismatch(
-        self,
-        el_p: NoteInfo,
-        el_s: NoteInfo,
-        i: int,
-    ):
+        # a mismatch whose perf note matches ours: swap
+        for j in self._candidates(self._mismatched_p, self._s_pitch[y], i):
+            self._swap_score_note(i, j)
+            return
+
+    def _fix_gap_el_p(self, x: int, i: int):
         """
-        el_p and el_s mismatch. Try to fix it.
+        Perf note P[x] has a gap score note. Try to fix it.
         """
-        next_indices = self._get_threshold_range(i)
-        for j in next_indices:
-            cand_el = self.alignment[j]
-            cand_el_p = cand_el["p"]
-            cand_el_s = cand_el["s"]
-            if cand_el_s is not None:
-                if cand_el_p is not None:
-                    if cand_el_s["midi_note_num"] != cand_el_p["midi_note_num"]:
-                        # mismatch too--check if cand_el_s matches ours
-                        if cand_el_s["midi_note_num"] == el_p["midi_note_num"]:
-                            self._swap_score_note(i, j)
-                            return
-                else:
-                    # cand_el["p"] is a gap
-                    # check if the note matches
-                    if cand_el_s["midi_note_num"] == el_p["midi_note_num"]:
-                        self._swap_score_note(i, j)
-                        return
+        for j in self._candidates(self._unmatched_s, self._p_pitch[x], i):
+            if self._pi[j] >= 0:
+                # a mismatch whose score note matches ours: swap
+                self._swap_score_note(i, j)
+                return
+            # a gap whose score note matches ours: merge them
+            self._unindex(j)
+            self._si[i] = self._si[j]
+            self._si[j] = -1
+            self._live.remove(j)
+            self._index(i)
+            self._update_next_time(i)
+            return
 
-    def _get_threshold_range(self, i: int) -> List[int]:
+    def _fix_mismatch(self, x: int, i: int):
         """
-        get valid indices forwards, with score time within
-        the threshold of the current--if available--score time, the closest preceding score
-        time and finally the closest succeeding score time.
-
-        Returns (valid indices forwards).
+        Perf note P[x] and its score note mismatch. Try to fix it.
         """
+        # a mismatch or gap whose score note matches ours: swap
+        for j in self._candidates(self._unmatched_s, self._p_pitch[x], i):
+            self._swap_score_note(i, j)
+            return
 
+    def _candidates(
+        self, index: Dict[int, SortedList], pitch: int, i: int
+    ) -> Iterator[int]:
+        """
+        Elements under pitch in index after i, in order, within lookforward_limit
+        elements of i and with score time within the threshold of the current--if
+        available--score time, the closest preceding score time and finally the
+        closest succeeding score time.
+        """
         # first find the closest score time to the current note
-        curr_score_time: Optional[float] = None
-        for j in range(i, -1, -1):
-            cand = self.alignment[j]
-            if cand["s"] is not None:
-                curr_score_time = cand["s"]["note_start"]
-                break
+        curr_score_time = self._prev_time[i]
         if curr_score_time is None:
-            for j in range(i + 1, len(self.alignment)):
-                cand = self.alignment[j]
-                if cand["s"] is not None:
-                    curr_score_time = cand["s"]["note_start"]
-                    break
+            curr_score_time = self._next_time[i]
         if curr_score_time is None:
             # no score time at all, may be a bogus alignment.
-            return []
+            return
+
+        # first element past the forward window
+        end = self._live.index(i) + self.lookforward_limit
+        stop: Optional[int] = self._live[end] if end < len(self._live) else None
+
+        for j in index.get(pitch, SortedList()).irange(i, stop, (False, False)):
+            d = abs(self._s_time[self._si[j]] - curr_score_time)
+            if d <= self.threshold_ms:
+                self._max_accepted = max(self._max_accepted, d)
+                yield j
+            else:
+                self._min_rejected = min(self._min_rejected, d)
+
+    def _build_index(self):
+        # positions of elements not merged away
+        self._live = SortedList(range(len(self._pi)))
+        # score pitch -> positions of elements whose score note is a gap or mismatch
+        self._unmatched_s: Dict[int, SortedList] = {}
+        # perf pitch -> positions of mismatches
+        self._mismatched_p: Dict[int, SortedList] = {}
+        for i in range(len(self._pi)):
+            self._index(i)
 
-        next_indices: List[int] = []
+        # score time of the closest element with a score note at or before, and at
+        # or after, each element. Elements only change once those before them have
+        # been walked past, so _prev_time stays valid for every element still to be
+        # walked; _next_time is kept up to date by _update_next_time.
+        n = len(self._pi)
+        self._prev_time: List[Optional[float]] = [None] * n
+        self._next_time: List[Optional[float]] = [None] * n
+        t = self._context[0]
+        for i in range(n):
+            if self._si[i] >= 0:
+                t = self._s_time[self._si[i]]
+            self._prev_time[i] = t
+        t = self._context[1]
+        for i in range(n - 1, -1, -1):
+            if self._si[i] >= 0:
+                t = self._s_time[self._si[i]]
+            self._next_time[i] = t
 
-        # Because score times are perturbed, don't instantly break when the first score_time is over
-        # the threshold. Look forward a certain number of notes.
-        LOOKFORWARD_LIMIT = 100
-        for j in range(i + 1, min(len(self.alignment), i + LOOKFORWARD_LIMIT)):
-            cand = self.alignment[j]
-            if cand["s"] is not None:
-                if abs(cand["s"]["note_start"] - curr_score_time) <= self.threshold_ms:
-                    next_indices.append(j)
+    def _index(self, i: int):
+        x = self._pi[i]
+        y = self._si[i]
+        if y < 0:
+            return
+        if x < 0 or self._p_pitch[x] != self._s_pitch[y]:
+            self._unmatched_s.setdefault(self._s_pitch[y], SortedList()).add(i)
+            if x >= 0:
+                self._mismatched_p.setdefault(self._p_pitch[x], SortedList()).add(i)
 
-        return next_indices
+    def _unindex(self, i: int):
+        x = self._pi[i]
+        y = self._si[i]
+        if y < 0:
+            return
+        if x < 0 or self._p_pitch[x] != self._s_pitch[y]:
+            self._unmatched_s[self._s_pitch[y]].remove(i)
+            if x >= 0:
+                self._mismatched_p[self._p_pitch[x]].remove(i)
 
     def _swap_score_note(self, i: int, j: int):
-        self.alignment[i]["s"], self.alignment[j]["s"] = (
-            self.alignment[j]["s"],
-            self.alignment[i]["s"],
-        )
+        self._unindex(i)
+        self._unindex(j)
+        self._si[i], self._si[j] = self._si[j], self._si[i]
+        self._index(i)
+        self._index(j)
+        self._update_next_time(i)
+
+    def _update_next_time(self, i: int):
+        """
+        Brings _next_time up to date after element i, and elements after it, changed.
+        """
+        # only read for elements with no score note at or before them, for which
+        # the closest score note after is i's: every repair leaves i with one
+        if i > 0 and self._prev_time[i - 1] is not None:
+            return
+        t = self._s_time[self._si[i]]
+        for k in range(i, -1, -1):
+            self._next_time[k] = t
+
+
+def _postalign_segment(job: SegmentJob) -> Tuple[List[IndexPair], float, float]:
+    path, P, S, threshold_ms, lookforward_limit, two_pass, context = job
+    pa = PostAlign.from_path(path, P, S, threshold_ms, lookforward_limit)
+    pa.two_pass = two_pass
+    pa._context = context
+    return pa._postalign_path(), pa._max_accepted, pa._min_rejected
@@ -65,3 +65,14 @@ def process_score_text(text: str) -> List[NoteInfo]:
         return {"note_start": float(ls[0]), "midi_note_num": int(ls[1])}
 
     return list(map(process_line, text.splitlines()))
+
+
+def process_notes_file(path: str) -> List[NoteInfo]:
+    """
+    Notes of a MIDI file (.mid/.midi) or a score file (anything else).
+    """
+    if path.lower().endswith((".mid", ".midi")):
+        from .midi import process_midi
+
+        return process_midi(path)
+    return process_score_file(path)
@@ -1,16 +1,28 @@
-from typing import List, Tuple
-from .sharedtypes import NoteInfo, Alignment
+from typing import Any, Callable, Iterable, List, Tuple
+from .sharedtypes import NoteInfo, AlignmentElem, AlignmentStats
 
 
-def alignment_repr(alignment: Alignment) -> Tuple[str, str]:
-    stdout = ""
-    stderr = ""
+def alignment_repr(alignment: Iterable[AlignmentElem]) -> Tuple[str, str]:
+    lines: List[str] = []
+    stderr = write_alignment_repr(alignment, lines.append)
+    return ("".join(lines), stderr)
+
 
+def write_alignment_repr(
+    alignment: Iterable[AlignmentElem], write: Callable[[str], Any]
+) -> str:
+    """
+    Writes the stdout part of alignment_repr line by line as alignment is consumed.
+
+    Returns the stderr part.
+    """
+    length = 0
     num_mismatches = 0
     num_pgaps = 0
     num_sgaps = 0
 
     for al in alignment:
+        length += 1
         p = al["p"]
         s = al["s"]
 
@@ -20,27 +32,42 @@ def alignment_repr(alignment: Alignment) -> Tuple[str, str]:
         if p is not None and s is not None:
             if p["midi_note_num"] == s["midi_note_num"]:
                 # match
-                stdout += f'{p["note_start"]} {s["note_start"]} {p["midi_note_num"]}\n'
+                write(f'{p["note_start"]} {s["note_start"]} {p["midi_note_num"]}\n')
             else:
                 # mismatch
                 num_mismatches += 1
-                stdout += f'// MISMATCH: {p["note_start"]} {p["midi_note_num"]} - {s["note_start"]} {s["midi_note_num"]}\n'
+                write(
+                    f'// MISMATCH: {p["note_start"]} {p["midi_note_num"]} - {s["note_start"]} {s["midi_note_num"]}\n'
+                )
 
         if p is None and s is not None:
             # gap in performance
             num_pgaps += 1
-            stdout += f'// GAP: GAP - {s["note_start"]} {s["midi_note_num"]}\n'
+            write(f'// GAP: GAP - {s["note_start"]} {s["midi_note_num"]}\n')
         if p is not None and s is None:
             # gap in score
             num_sgaps += 1
-            stdout += f'// GAP: {p["note_start"]} {p["midi_note_num"]} - GAP\n'
+            write(f'// GAP: {p["note_start"]} {p["midi_note_num"]} - GAP\n')
+
+    return _counts_repr(length, num_pgaps, num_sgaps, num_mismatches)
 
-    stderr += f"Length of alignment: {len(alignment)}\n"
+
+def alignment_stats_repr(stats: AlignmentStats) -> str:
+    return f"Alignment score: {stats['score']}\n" + _counts_repr(
+        stats["length"], stats["num_pgaps"], stats["num_sgaps"], stats["num_mismatches"]
+    )
+
+
+def _counts_repr(
+    length: int, num_pgaps: int, num_sgaps: int, num_mismatches: int
+) -> str:
+    stderr = ""
+    stderr += f"Length of alignment: {length}\n"
     stderr += f"Total number of gaps in performance: {num_pgaps}\n"
     stderr += f"Total number of gaps in score: {num_sgaps}\n"
     stderr += f"Total number of mismatches: {num_mismatches}\n"
 
-    return (stdout, stderr)
+    return stderr
 
 
 def noteinfos_repr(ns: List[NoteInfo]) -> str:
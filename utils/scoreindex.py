@@ -0,0 +1,134 @@
+import json
+from collections import Counter
+from typing import Dict, List, Tuple, TypedDict
+from .sharedtypes import NoteInfo
+
+# notes per indexed n-gram, keyed on the n - 1 intervals between them
+DEFAULT_INDEX_NGRAM = 5
+
+# notes starting within this many ms of the first note of a chord are one chord
+DEFAULT_CHORD_TOLERANCE_MS = 50.0
+
+
+class IndexCandidate(TypedDict):
+    name: str  # score the fragment was found in
+    position: int  # index of the note the fragment starts at, in canonical order
+    note_start: float  # start time of that note in the score (ms)
+    votes: int  # fragment n-grams agreeing on this position
+
+
+class ScoreIndex:
+    """
+    Inverted index from pitch-interval n-grams to positions in a library of
+    scores, so a fragment is found in any transposition.
+
+    Chord notes are put in pitch order (see canonical) on both sides, so the
+    order in which a performer plays them does not matter.
+    """
+
+    def __init__(
+        self,
+        n: int = DEFAULT_INDEX_NGRAM,
+        tolerance_ms: float = DEFAULT_CHORD_TOLERANCE_MS,
+    ):
+        if n < 2:
+            raise ValueError(f"n-grams need at least 2 notes, got {n}")
+        self.n = n
+        self.tolerance_ms = tolerance_ms
+        self.names: List[str] = []
+        # note start times of each score, in canonical order
+        self.times: List[List[float]] = []
+        # n-gram key -> [(score id, position)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+
+    def add(self, name: str, notes: List[NoteInfo]):
+        """
+        Indexes the score notes under name.
+        """
+        notes = canonical(notes, self.tolerance_ms)
+        sid = len(self.names)
+        self.names.append(name)
+        self.times.append([n["note_start"] for n in notes])
+        for pos, key in enumerate(self._keys(notes)):
+            self.postings.setdefault(key, []).append((sid, pos))
+
+    def lookup(self, fragment: List[NoteInfo], top: int = 10) -> List[IndexCandidate]:
+        """
+        Score positions the fragment most likely starts at, best first.
+
+        Each n-gram of the fragment votes for every indexed position it occurs at,
+        shifted back by its offset in the fragment.
+        """
+        votes: Counter = Counter()
+        fragment = canonical(fragment, self.tolerance_ms)
+        for offset, key in enumerate(self._keys(fragment)):
+            for sid, pos in self.postings.get(key, []):
+                votes[(sid, pos - offset)] += 1
+
+        candidates: List[IndexCandidate] = []
+        for (sid, pos), count in votes.most_common(top):
+            times = self.times[sid]
+            candidates.append(
+                {
+                    "name": self.names[sid],
+                    "position": pos,
+                    "note_start": times[min(max(pos, 0), len(times) - 1)],
+                    "votes": count,
+                }
+            )
+        return candidates
+
+    def save(self, path: str):
+        f = open(path, "w")
+        json.dump(
+            {
+                "n": self.n,
+                "tolerance_ms": self.tolerance_ms,
+                "names": self.names,
+                "times": self.times,
+                "postings": self.postings,
+            },
+            f,
+        )
+        f.close()
+
+    @classmethod
+    def load(cls, path: str) -> "ScoreIndex":
+        f = open(path)
+        data = json.load(f)
+        f.close()
+        index = cls(data["n"], data["tolerance_ms"])
+        index.names = data["names"]
+        index.times = data["times"]
+        index.postings = {
+            key: [(sid, pos) for sid, pos in posting]
+            for key, posting in data["postings"].items()
+        }
+        return index
+
+    def _keys(self, notes: List[NoteInfo]) -> List[str]:
+        pitches = [n["midi_note_num"] for n in notes]
+        intervals = [b - a for a, b in zip(pitches, pitches[1:])]
+        return [
+            ",".join(map(str, intervals[i : i + self.n - 1]))
+            for i in range(len(pitches) - self.n + 1)
+        ]
+
+
+def canonical(notes: List[NoteInfo], tolerance_ms: float) -> List[NoteInfo]:
+    """
+    notes with each chord (notes starting within tolerance_ms of its first note)
+    in ascending pitch order.
+    """
+    out: List[NoteInfo] = []
+    chord: List[NoteInfo] = []
+    for note in notes:
+        if (
+            len(chord) > 0
+            and note["note_start"] - chord[0]["note_start"] > tolerance_ms
+        ):
+            out.extend(sorted(chord, key=lambda n: n["midi_note_num"]))
+            chord = []
+        chord.append(note)
+    out.extend(sorted(chord, key=lambda n: n["midi_note_num"]))
+    return out
@@ -27,3 +27,11 @@ class AlignmentElem(TypedDict):
 
 
 Alignment = List[AlignmentElem]
+
+
+class AlignmentStats(TypedDict):
+    score: int  # alignment score
+    length: int  # number of alignment elements
+    num_pgaps: int  # gaps in performance
+    num_sgaps: int  # gaps in score
+    num_mismatches: int  # aligned notes with different MIDI note numbers
@@ -0,0 +1,141 @@
+import json
+import zlib
+import numpy as np  # type: ignore
+from typing import Dict, List, TypedDict
+from .scoreindex import DEFAULT_CHORD_TOLERANCE_MS, canonical
+from .sharedtypes import NoteInfo
+
+# notes per shingle, keyed on the intervals between them
+DEFAULT_SHINGLE = 4
+
+# hash functions (and so values) per MinHash signature
+DEFAULT_NUM_PERM = 128
+
+# universal hashing (a * x + b) mod _PRIME, with fixed a, b so signatures persist
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(846)
+_A = _rng.integers(1, _PRIME, DEFAULT_NUM_PERM, dtype=np.int64)
+_B = _rng.integers(0, _PRIME, DEFAULT_NUM_PERM, dtype=np.int64)
+
+
+class Sketch(TypedDict):
+    shingles: int  # number of distinct shingles
+    minhash: List[int]  # smallest hash of the shingles under each hash function
+    histogram: List[float]  # pitch class distribution, unit length
+
+
+class SketchCandidate(TypedDict):
+    name: str  # library score
+    jaccard: float  # estimated Jaccard similarity of the shingle sets
+    cosine: float  # cosine similarity of the pitch class histograms
+
+
+def sketch(
+    notes: List[NoteInfo],
+    shingle: int = DEFAULT_SHINGLE,
+    tolerance_ms: float = DEFAULT_CHORD_TOLERANCE_MS,
+) -> Sketch:
+    """
+    MinHash signature of the set of pitch-interval shingles of notes (chords in
+    pitch order, see canonical), and their pitch class histogram.
+    """
+    pitches = [n["midi_note_num"] for n in canonical(notes, tolerance_ms)]
+    intervals = [b - a for a, b in zip(pitches, pitches[1:])]
+    keys = {
+        ",".join(map(str, intervals[i : i + shingle - 1]))
+        for i in range(len(pitches) - shingle + 1)
+    }
+    hashes = np.array([zlib.crc32(k.encode()) for k in keys], dtype=np.int64) % _PRIME
+    if len(hashes) > 0:
+        minhash = ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+    else:
+        minhash = np.full(DEFAULT_NUM_PERM, _PRIME, dtype=np.int64)
+
+    histogram = np.bincount(np.array(pitches, dtype=np.int64) % 12, minlength=12)
+    norm = np.linalg.norm(histogram)
+    return {
+        "shingles": len(keys),
+        "minhash": minhash.tolist(),
+        "histogram": (histogram / norm if norm > 0 else histogram * 0.0).tolist(),
+    }
+
+
+def jaccard(a: Sketch, b: Sketch) -> float:
+    """
+    Estimated Jaccard similarity of the shingle sets of a and b.
+    """
+    if a["shingles"] == 0 or b["shingles"] == 0:
+        return 0.0
+    return float(np.mean(np.array(a["minhash"]) == np.array(b["minhash"])))
+
+
+def cosine(a: Sketch, b: Sketch) -> float:
+    """
+    Cosine similarity of the pitch class histograms of a and b.
+    """
+    return float(np.dot(a["histogram"], b["histogram"]))
+
+
+def rank(query: Sketch, library: Dict[str, Sketch]) -> List[SketchCandidate]:
+    """
+    Similarity of each library sketch to query, most similar first.
+
+    Ordered by jaccard; the histograms only break ties, such as between pieces
+    sharing no shingle with query.
+    """
+    candidates: List[SketchCandidate] = [
+        {"name": name, "jaccard": jaccard(query, sk), "cosine": cosine(query, sk)}
+        for name, sk in library.items()
+    ]
+    return sorted(candidates, key=lambda c: (-c["jaccard"], -c["cosine"]))
+
+
+class SketchLibrary:
+    """
+    Sketches of a library of scores, to rank them by similarity to a performance
+    far more cheaply than aligning it against each.
+    """
+
+    def __init__(
+        self,
+        shingle: int = DEFAULT_SHINGLE,
+        tolerance_ms: float = DEFAULT_CHORD_TOLERANCE_MS,
+    ):
+        if shingle < 2:
+            raise ValueError(f"Shingles need at least 2 notes, got {shingle}")
+        self.shingle = shingle
+        self.tolerance_ms = tolerance_ms
+        self.sketches: Dict[str, Sketch] = {}
+
+    def add(self, name: str, notes: List[NoteInfo]):
+        """
+        Sketches the score notes under name.
+        """
+        self.sketches[name] = sketch(notes, self.shingle, self.tolerance_ms)
+
+    def rank(self, notes: List[NoteInfo]) -> List[SketchCandidate]:
+        """
+        Library scores by estimated similarity to notes, best first.
+        """
+        return rank(sketch(notes, self.shingle, self.tolerance_ms), self.sketches)
+
+    def save(self, path: str):
+        f = open(path, "w")
+        json.dump(
+            {
+                "shingle": self.shingle,
+                "tolerance_ms": self.tolerance_ms,
+                "sketches": self.sketches,
+            },
+            f,
+        )
+        f.close()
+
+    @classmethod
+    def load(cls, path: str) -> "SketchLibrary":
+        f = open(path)
+        data = json.load(f)
+        f.close()
+        library = cls(data["shingle"], data["tolerance_ms"])
+        library.sketches = data["sketches"]
+        return library
@@ -0,0 +1,59 @@
+import numpy as np  # type: ignore
+from typing import Tuple
+from .anchor import DEFAULT_NGRAM, find_anchors
+from .dp import _normalise_band
+
+# score ms either side of the tempo mapping searched by band_by_tempo
+DEFAULT_TEMPO_TOLERANCE_MS = 1000.0
+
+
+def tempo_map(
+    p: np.ndarray,
+    p_times: np.ndarray,
+    s: np.ndarray,
+    s_times: np.ndarray,
+    k: int = DEFAULT_NGRAM,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Piecewise-linear mapping from performance ms to score ms.
+
+    Knots are the onsets of confidently matched notes: the anchors of find_anchors,
+    which only pairs runs of k notes that occur once in each and are in order, plus
+    the first and last notes of each. Knots sharing a performance time are
+    averaged and score times are kept non-decreasing.
+    Returns (performance ms, score ms) of the knots, for np.interp.
+    """
+    if len(p) == 0 or len(s) == 0:
+        return np.zeros(1), np.zeros(1)
+    pairs = [(0, 0), (len(p) - 1, len(s) - 1)]
+    for ai, aj, al in find_anchors(p, s, k):
+        pairs.extend((ai + t, aj + t) for t in range(al))
+    xs = p_times[[i for i, _ in pairs]]
+    ys = s_times[[j for _, j in pairs]]
+
+    knots_x, inverse = np.unique(xs, return_inverse=True)
+    knots_y = np.bincount(inverse, weights=ys) / np.bincount(inverse)
+    return knots_x, np.maximum.accumulate(knots_y)
+
+
+def band_by_tempo(
+    p_times: np.ndarray,
+    s_times: np.ndarray,
+    knots: Tuple[np.ndarray, np.ndarray],
+    tolerance_ms: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Band of columns whose score notes start within tolerance_ms of the score time
+    the tempo mapping knots (see tempo_map) gives each performance note.
+
+    Returns (lo, hi) as band_by_notes.
+    """
+    n = len(p_times)
+    m = len(s_times)
+    lo = np.zeros(n + 1, dtype=np.int64)
+    hi = np.zeros(n + 1, dtype=np.int64)
+    # row i > 0 has consumed performance note i - 1
+    mapped = np.interp(p_times, knots[0], knots[1])
+    lo[1:] = np.searchsorted(s_times, mapped - tolerance_ms, side="left")
+    hi[1:] = np.searchsorted(s_times, mapped + tolerance_ms, side="right")
+    return _normalise_band(lo, hi, m)
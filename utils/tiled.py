@@ -0,0 +1,128 @@
+import os
+import numpy as np  # type: ignore
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .dp import DIAG, DOWN, LEFT, IndexPair, replay, walk
+
+# tile side length (cells) scheduled as one job
+DEFAULT_TILE = 512
+
+# per-worker views on the shared grids, set up by _attach
+_shared: Dict[str, Any] = {}
+
+
+def tiled(
+    p: np.ndarray,
+    s: np.ndarray,
+    table: np.ndarray,
+    gamma: int,
+    workers: Optional[int] = None,
+    tile: int = DEFAULT_TILE,
+) -> Iterator[IndexPair]:
+    """
+    iter_traceback(fill_wavefront(p, s, table, gamma)[1]), with the grid split into tiles
+    filled by a process pool.
+
+    Tiles on the same anti-diagonal of tiles are independent and run concurrently.
+    The score and direction grids live in shared memory, so workers write their
+    tiles in place.
+    """
+    n = len(p)
+    m = len(s)
+    shape = (n + 1, m + 1)
+    H_shm = shared_memory.SharedMemory(create=True, size=max(1, 4 * (n + 1) * (m + 1)))
+    D_shm = shared_memory.SharedMemory(create=True, size=max(1, (n + 1) * (m + 1)))
+    try:
+        H = np.ndarray(shape, dtype=np.int32, buffer=H_shm.buf)
+        D = np.ndarray(shape, dtype=np.uint8, buffer=D_shm.buf)
+        H[0] = np.arange(m + 1) * gamma
+        H[:, 0] = np.arange(n + 1) * gamma
+        D[0] = DOWN
+        D[:, 0] = LEFT
+        D[0, 0] = 0
+
+        row_tiles = [(r, min(r + tile, n + 1)) for r in range(1, n + 1, tile)]
+        col_tiles = [(c, min(c + tile, m + 1)) for c in range(1, m + 1, tile)]
+        if len(row_tiles) > 0 and len(col_tiles) > 0:
+            with ProcessPoolExecutor(
+                max_workers=workers if workers is not None else os.cpu_count(),
+                initializer=_attach,
+                initargs=(H_shm.name, D_shm.name, shape, p, s, table, gamma),
+            ) as executor:
+                for t in range(len(row_tiles) + len(col_tiles) - 1):
+                    jobs = [
+                        (row_tiles[bi], col_tiles[t - bi])
+                        for bi in range(
+                            max(0, t - len(col_tiles) + 1),
+                            min(t, len(row_tiles) - 1) + 1,
+                        )
+                    ]
+                    # wait for this wavefront before starting the next
+                    list(executor.map(_fill_tile, jobs))
+
+        moves = walk(n, m, D.item)
+        del H, D
+        return replay(moves)
+    finally:
+        H_shm.close()
+        H_shm.unlink()
+        D_shm.close()
+        D_shm.unlink()
+
+
+def _attach(
+    H_name: str,
+    D_name: str,
+    shape: Tuple[int, int],
+    p: np.ndarray,
+    s: np.ndarray,
+    table: np.ndarray,
+    gamma: int,
+):
+    H_shm = shared_memory.SharedMemory(name=H_name)
+    D_shm = shared_memory.SharedMemory(name=D_name)
+    # keep the segments referenced for the lifetime of the worker
+    _shared["shm"] = (H_shm, D_shm)
+    _shared["H"] = np.ndarray(shape, dtype=np.int32, buffer=H_shm.buf)
+    _shared["D"] = np.ndarray(shape, dtype=np.uint8, buffer=D_shm.buf)
+    _shared["p"] = p
+    _shared["s"] = s
+    _shared["table"] = table
+    _shared["gamma"] = gamma
+
+
+def _fill_tile(job: Tuple[Tuple[int, int], Tuple[int, int]]):
+    """
+    Fills rows r0..r1 - 1, columns c0..c1 - 1 of the shared grid.
+
+    Needs the row above and the column to the left of the tile to be filled.
+    """
+    (r0, r1), (c0, c1) = job
+    H = _shared["H"]
+    D = _shared["D"]
+    p = _shared["p"]
+    s = _shared["s"]
+    table = _shared["table"]
+    gamma = _shared["gamma"]
+
+    # column c0 - 1 is the left neighbour, carried along the running maximum
+    ramp = np.arange(c1 - c0 + 1, dtype=np.int64) * gamma
+    sims = table[:, s[c0 - 1 : c1 - 1]]
+    prev = H[r0 - 1, c0 - 1 : c1].astype(np.int64)
+    for i in range(r0, r1):
+        diag = prev[:-1] + sims[p[i - 1]]
+        left = prev[1:] + gamma
+
+        a = np.empty(c1 - c0 + 1, dtype=np.int64)
+        a[0] = H[i, c0 - 1]
+        np.maximum(diag, left, out=a[1:])
+        row = np.maximum.accumulate(a - ramp) + ramp
+
+        H[i, c0:c1] = row[1:]
+        D[i, c0:c1] = (
+            (row[1:] == diag) * DIAG
+            | (row[1:] == left) * LEFT
+            | (row[1:] == row[:-1] + gamma) * DOWN
+        )
+        prev = row
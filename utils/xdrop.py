@@ -0,0 +1,81 @@
+import numpy as np  # type: ignore
+from typing import List, Tuple
+from .dp import DIAG, DOWN, LEFT, NEG_INF, IndexPair, replay, walk
+
+# how far (in score) a cell may fall below the best cell of its anti-diagonal
+DEFAULT_XDROP = 30
+
+
+def align_xdrop(
+    p: np.ndarray, s: np.ndarray, table: np.ndarray, gamma: int, x: int
+) -> Tuple[List[IndexPair], int]:
+    """
+    fill_wavefront with X-drop pruning, then traceback.
+
+    Cells scoring more than x below the best cell of their anti-diagonal are
+    dropped and not extended, and each anti-diagonal only spans the rows between
+    its first and last surviving cells, so the search region follows the
+    alignment wherever it drifts. Not guaranteed optimal.
+    Returns the path and the number of cells computed.
+    """
+    n = len(p)
+    m = len(s)
+    if n == 0 or m == 0:
+        return [(i, -1) for i in range(n)] + [(-1, j) for j in range(m)], n + m + 1
+
+    # scores of the last two anti-diagonals and the current one, by row, with
+    # index 0 standing in for row -1
+    prev2 = np.full(n + 2, NEG_INF, dtype=np.int64)
+    prev1 = np.full(n + 2, NEG_INF, dtype=np.int64)
+    cur = np.full(n + 2, NEG_INF, dtype=np.int64)
+    prev1[1] = 0
+    # live rows of the last two anti-diagonals
+    lo1, hi1 = 0, 0
+    lo2, hi2 = 1, 0
+
+    # direction bits of the live rows of each anti-diagonal, concatenated
+    starts = np.zeros(n + m + 1, dtype=np.int64)
+    offsets = np.zeros(n + m + 2, dtype=np.int64)
+    segments = [np.zeros(1, dtype=np.uint8)]
+    offsets[1] = 1
+    computed = 1
+
+    for d in range(1, n + m + 1):
+        lo = max(min(lo1, lo2 + 1), d - m)
+        hi = min(max(hi1, hi2) + 1, n, d)
+        rows = np.arange(lo, hi + 1)
+        computed += len(rows)
+
+        # cell (i, d - i) is at index i + 1
+        diag = prev2[lo : hi + 1] + table[p[rows - 1], s[d - rows - 1]]
+        left = prev1[lo : hi + 1] + gamma
+        down = prev1[lo + 1 : hi + 2] + gamma
+        h = np.maximum(np.maximum(diag, left), down)
+        # cells next to the grid edge have no diag (and no left or down) neighbour
+        h[h < NEG_INF // 2] = NEG_INF
+        h[h < h.max() - x] = NEG_INF
+
+        live = np.flatnonzero(h > NEG_INF)
+        a = live[0]
+        b = live[-1] + 1
+        cur[lo + a + 1 : lo + b + 1] = h[a:b]
+        h = h[a:b]
+        starts[d] = lo + a
+        segments.append(
+            (
+                (h == diag[a:b]) * DIAG
+                | (h == left[a:b]) * LEFT
+                | (h == down[a:b]) * DOWN
+            ).astype(np.uint8)
+        )
+        offsets[d + 1] = offsets[d] + (b - a)
+
+        # recycle the oldest anti-diagonal as the next one
+        prev2[lo2 + 1 : hi2 + 2] = NEG_INF
+        prev2, prev1, cur = prev1, cur, prev2
+        lo2, hi2 = lo1, hi1
+        lo1, hi1 = lo + a, lo + b - 1
+
+    D = np.concatenate(segments)
+    moves = walk(n, m, lambda i, j: D.item(offsets[i + j] + i - starts[i + j]))
+    return list(replay(moves)), computed